@@ -0,0 +1,165 @@
+import argparse
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+from PIL import Image
+
+import settings
+from processing.filters import FILTERS
+from processing.pipeline import DEFAULT_STATE
+from processing.tiling import render_full_resolution
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff', '.webp')
+EXT_MAP = {"JPEG": "jpg", "PNG": "png", "BMP": "bmp"}
+
+# Recipe keys besides the DEFAULT_STATE ones
+RECIPE_EXTRA_KEYS = ('filter', 'source_size')
+
+
+def load_recipe(path):
+    """Read an edit recipe (the dict from MemoryLensGUI.get_current_state) from JSON
+
+    An album sidecar (storage.album, recipe nested under "recipe") works
+    too. Raises ValueError for unknown keys and preset names.
+    """
+    with open(path) as f:
+        recipe = json.load(f)
+    if not isinstance(recipe, dict):
+        raise ValueError("the recipe must be a JSON object")
+    if isinstance(recipe.get('recipe'), dict):
+        recipe = recipe['recipe']
+
+    unknown = sorted(key for key in recipe if key not in DEFAULT_STATE and key not in RECIPE_EXTRA_KEYS)
+    if unknown:
+        raise ValueError(f"unknown recipe keys: {', '.join(unknown)}")
+
+    state = {key: recipe[key] for key in DEFAULT_STATE if key in recipe}
+
+    # Optional preset name instead of filter_index
+    if 'filter' in recipe:
+        names = [name.lower() for name, _ in FILTERS]
+        if str(recipe['filter']).lower() not in names:
+            raise ValueError(f"unknown filter \"{recipe['filter']}\", use one of: "
+                             + ", ".join(name for name, _ in FILTERS))
+        state['filter_index'] = names.index(str(recipe['filter']).lower())
+
+    crop_box = state.get('crop_box')
+    if crop_box:
+        if max(crop_box) > 1:
+            # Pixel box from an older recipe, normalize with the size it was drawn on
+            if 'source_size' not in recipe:
+                raise ValueError("crop_box is in pixels, add \"source_size\": [width, height] to the recipe")
+            w, h = recipe['source_size']
+            crop_box = (crop_box[0] / w, crop_box[1] / h, crop_box[2] / w, crop_box[3] / h)
+        state['crop_box'] = tuple(crop_box)
+    return state
+
+
+def find_images(input_dir):
+    for root, _, files in os.walk(input_dir):
+        for name in sorted(files):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                yield os.path.join(root, name)
+
+
+def output_path(path, input_dir, output_dir, format):
+    """Where the render of path goes: same relative path, extension of format"""
+    relative = os.path.relpath(path, input_dir)
+    ext = EXT_MAP.get(format, "jpg")
+    return os.path.join(output_dir, os.path.splitext(relative)[0] + "." + ext)
+
+
+def split_collisions(files, input_dir, output_dir, format):
+    """(files to render, [(file, earlier file with the same output)])
+
+    IMG_1.jpg and IMG_1.png would both be saved as IMG_1.<ext>, only the
+    first one (in find_images order) is rendered.
+    """
+    owners = {}
+    keep, collisions = [], []
+    for path in files:
+        key = os.path.normcase(output_path(path, input_dir, output_dir, format))
+        if key in owners:
+            collisions.append((path, owners[key]))
+        else:
+            owners[key] = path
+            keep.append(path)
+    return keep, collisions
+
+
+# Per-process job settings, set once by the pool initializer
+_job = {}
+
+def _init_worker(state, input_dir, output_dir, format, quality):
+    _job.update(state=state, input_dir=input_dir, output_dir=output_dir,
+                format=format, quality=quality)
+
+
+def process_file(path):
+    """Render one file, returns (path, error message or None)"""
+    try:
+        save_path = output_path(path, _job['input_dir'], _job['output_dir'], _job['format'])
+        os.makedirs(os.path.dirname(save_path), exist_ok=True)
+
+        with Image.open(path) as image:
+            result = render_full_resolution(image, _job['state'],
+                                            tiled_min_pixels=settings.TILED_RENDER_MIN_PIXELS,
+                                            memory_budget=settings.TILE_MEMORY_BUDGET)
+
+        if _job['format'] == "JPEG":
+            result.convert("RGB").save(save_path, format="JPEG", quality=_job['quality'])
+        else:
+            result.save(save_path, format=_job['format'])
+        return path, None
+    except Exception as e:
+        return path, str(e)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply a MemoryLens edit recipe to every image in a folder")
+    parser.add_argument("recipe", help="recipe JSON (edit state as saved by the editor)")
+    parser.add_argument("input_dir")
+    parser.add_argument("output_dir")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count(), help="worker processes (default: all cores)")
+    parser.add_argument("-f", "--format", default="JPEG", choices=sorted(EXT_MAP))
+    parser.add_argument("-q", "--quality", type=int, default=95, help="JPEG quality (default: 95)")
+    args = parser.parse_args(argv)
+
+    try:
+        state = load_recipe(args.recipe)
+    except (OSError, ValueError) as e:
+        parser.error(f"can't use recipe {args.recipe}: {e}")
+    files = list(find_images(args.input_dir))
+    if not files:
+        print(f"No images found in {args.input_dir}")
+        return 1
+
+    files, collisions = split_collisions(files, args.input_dir, args.output_dir, args.format)
+    for path, first in collisions:
+        print(f"  Failed: {path}: same output file as {first}, skipped")
+
+    total = len(files) + len(collisions)
+    print(f"Processing {len(files)} images with {args.workers} workers...")
+    start = time.perf_counter()
+    failed = len(collisions)
+    init_args = (state, args.input_dir, args.output_dir, args.format, args.quality)
+    with Pool(args.workers, initializer=_init_worker, initargs=init_args) as pool:
+        for done, (path, error) in enumerate(pool.imap_unordered(process_file, files), 1):
+            if error:
+                failed += 1
+                print(f"  Failed: {path}: {error}")
+            if done % 50 == 0:
+                elapsed = time.perf_counter() - start
+                print(f"  {done}/{len(files)} ({done / elapsed:.1f} images/s)")
+
+    elapsed = time.perf_counter() - start
+    ok = total - failed
+    print(f"Done: {ok} saved, {failed} failed in {elapsed:.1f}s ({ok / elapsed:.2f} images/s)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
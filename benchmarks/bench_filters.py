@@ -0,0 +1,74 @@
+# Benchmark: preset filters, old float32 NumPy versions vs uint8 LUT/matrix versions
+# Usage: python -m benchmarks.bench_filters [megapixels ...]
+#
+# Tolerance: the LUTs are built with the same float32 arithmetic and the
+# sepia matrix compensates Pillow's rounding, so outputs are expected to be
+# identical. Up to 1 level per channel is accepted (float summation order
+# inside Pillow's matrix convert may differ on other platforms).
+import sys
+from functools import partial
+
+import numpy as np
+from PIL import Image, ImageEnhance
+
+from benchmarks.common import make_image, measure, size_for
+from processing.filters import apply_warm_filter, apply_cold_filter, apply_vintage_filter
+
+TOLERANCE = 1
+
+def old_warm_filter(image):
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    img_array = np.array(image, dtype=np.float32)
+    img_array[:, :, 0] = np.clip(img_array[:, :, 0] * 1.15, 0, 255)
+    img_array[:, :, 1] = np.clip(img_array[:, :, 1] * 1.05, 0, 255)
+    img_array[:, :, 2] = np.clip(img_array[:, :, 2] * 0.9, 0, 255)
+    return Image.fromarray(img_array.astype(np.uint8))
+
+def old_cold_filter(image):
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    img_array = np.array(image, dtype=np.float32)
+    img_array[:, :, 0] = np.clip(img_array[:, :, 0] * 0.85, 0, 255)
+    img_array[:, :, 1] = np.clip(img_array[:, :, 1] * 1.0, 0, 255)
+    img_array[:, :, 2] = np.clip(img_array[:, :, 2] * 1.2, 0, 255)
+    return Image.fromarray(img_array.astype(np.uint8))
+
+def old_vintage_filter(image):
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    img_array = np.array(image, dtype=np.float32)
+    sepia_r = img_array[:, :, 0] * 0.393 + img_array[:, :, 1] * 0.769 + img_array[:, :, 2] * 0.189
+    sepia_g = img_array[:, :, 0] * 0.349 + img_array[:, :, 1] * 0.686 + img_array[:, :, 2] * 0.168
+    sepia_b = img_array[:, :, 0] * 0.272 + img_array[:, :, 1] * 0.534 + img_array[:, :, 2] * 0.131
+    img_array[:, :, 0] = np.clip(sepia_r, 0, 255)
+    img_array[:, :, 1] = np.clip(sepia_g, 0, 255)
+    img_array[:, :, 2] = np.clip(sepia_b, 0, 255)
+    sepia_img = Image.fromarray(img_array.astype(np.uint8))
+    return ImageEnhance.Contrast(sepia_img).enhance(0.9)
+
+def _setup(size):
+    return (make_image(size),)
+
+PAIRS = [
+    ("warm", old_warm_filter, apply_warm_filter),
+    ("cold", old_cold_filter, apply_cold_filter),
+    ("vintage", old_vintage_filter, apply_vintage_filter),
+]
+
+def main(megapixels=(1, 12)):
+    print(f"{'filter':>8} {'MP':>4} {'old time':>9} {'new time':>9} {'old peak':>9} {'new peak':>9} {'max diff':>8}")
+    for mp in megapixels:
+        size = size_for(mp)
+        setup = partial(_setup, size)
+        for name, old, new in PAIRS:
+            image = make_image(size)
+            diff = np.abs(np.asarray(old(image), dtype=np.int16) - np.asarray(new(image), dtype=np.int16)).max()
+            old_t, old_mem = measure(setup, old)
+            new_t, new_mem = measure(setup, new)
+            status = "" if diff <= TOLERANCE else "  FAIL"
+            print(f"{name:>8} {mp:>4} {old_t * 1000:7.1f}ms {new_t * 1000:7.1f}ms "
+                  f"{old_mem / 2**20:7.1f}MB {new_mem / 2**20:7.1f}MB {diff:>8}{status}")
+
+if __name__ == "__main__":
+    main([float(a) for a in sys.argv[1:]] or (1, 12))
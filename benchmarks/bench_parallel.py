@@ -0,0 +1,57 @@
+# Benchmark: tile-parallel rendering, scaling from 1 to N worker threads
+# Usage: python -m benchmarks.bench_parallel [--megapixels 12] [--workers 1 2 4 8 16] [--repeats 3]
+#
+# Renders a sharpen-heavy edit (fused adjustments, warm preset, sharpen with
+# its halo rows) with render_tiled(workers=n) and prints speedup and
+# parallel efficiency against one worker. Also checks that every worker
+# count gives the same pixels as pipeline.render().
+import argparse
+import os
+import time
+
+import numpy as np
+
+from benchmarks.common import make_image, size_for
+from processing.pipeline import render
+from processing.tiling import render_tiled
+
+STATE = {
+    'bright': 110, 'contrast': 120, 'sat': 130, 'mono': 0, 'sharp': 100,
+    'rotation': 90, 'flip_h': False, 'flip_v': False, 'crop_box': None, 'filter_index': 1,
+}
+
+def best_time(func, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main(argv=None):
+    cores = os.cpu_count() or 1
+    default_workers = sorted({1, 2, 4, 8, 16, cores} & set(range(1, cores + 1)))
+    parser = argparse.ArgumentParser(description="Tile-parallel render scaling")
+    parser.add_argument("--megapixels", type=float, default=12)
+    parser.add_argument("--workers", type=int, nargs="+", default=default_workers)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    image = make_image(size_for(args.megapixels))
+    reference = np.asarray(render(image, STATE))
+    print(f"{args.megapixels:g} MP, {cores} cores")
+    print(f"{'workers':>7} {'time':>9} {'speedup':>8} {'efficiency':>10}")
+    base = None
+    for workers in args.workers:
+        result = render_tiled(image, STATE, workers=workers)
+        if not np.array_equal(np.asarray(result), reference):
+            print(f"{workers:>7}  output differs from render()")
+            return 1
+        seconds = best_time(lambda: render_tiled(image, STATE, workers=workers), args.repeats)
+        base = base or seconds
+        speedup = base / seconds
+        print(f"{workers:>7} {seconds * 1000:7.0f}ms {speedup:7.2f}x {speedup / workers:9.0%}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,159 @@
+# Benchmark suite: every processing function over synthetic images
+# Usage: python -m benchmarks.bench_processing [--sizes 1 12 48] [--modes RGB RGBA L]
+#            [--only NAME ...] [--output results.json]
+#            [--baseline baseline.json [--threshold 0.15] [--update-baseline]]
+#
+# Each case runs in a fresh process (benchmarks.common.measure) and records
+# the best wall time and the peak RSS increase of the first call. Results
+# are saved as JSON keyed "function/mode/MP". With --baseline, cases slower
+# (or hungrier) than the baseline by more than the threshold are reported
+# and the exit status is 1. Baselines are machine specific: record one with
+# --update-baseline on the machine that runs the comparison.
+import argparse
+import json
+import platform
+import sys
+import time
+from functools import partial
+
+import numpy as np
+import PIL
+
+from benchmarks.common import make_image, measure, size_for
+from processing.brightness import adjust_brightness
+from processing.contrast import adjust_contrast
+from processing.saturation import adjust_saturation
+from processing.monochrome import apply_monochrome
+from processing.sharpen import apply_sharpen
+from processing.fused import fused_adjust
+from processing.filters import (
+    apply_warm_filter, apply_cold_filter, apply_vintage_filter, apply_bw_filter
+)
+from processing.geometry import apply_rotate, apply_flip, apply_orientation
+from processing.pipeline import DEFAULT_STATE, render
+
+# Rotated, flipped and tightly cropped (4% of the frame kept), with sharpening
+TIGHT_CROP_STATE = {**DEFAULT_STATE, 'rotation': 90, 'flip_h': True,
+                    'crop_box': (0.4, 0.4, 0.6, 0.6), 'sharp': 100}
+
+# (name, function, extra arguments after the image)
+CASES = [
+    ("brightness", adjust_brightness, (1.3,)),
+    ("contrast", adjust_contrast, (1.3,)),
+    ("contrast_mean", adjust_contrast, (1.3, 118)),
+    ("saturation", adjust_saturation, (1.3,)),
+    ("monochrome", apply_monochrome, (0.6,)),
+    ("sharpen", apply_sharpen, (1.0,)),
+    ("fused_adjust", fused_adjust, (1.2, 1.3, 1.4, 0.3)),
+    ("warm", apply_warm_filter, ()),
+    ("cold", apply_cold_filter, ()),
+    ("vintage", apply_vintage_filter, ()),
+    ("bw", apply_bw_filter, ()),
+    ("rotate_15", apply_rotate, (15,)),
+    ("flip_h", apply_flip, ("horizontal",)),
+    ("orientation_90_flip", apply_orientation, (90, True, False)),
+    ("render_tight_crop", render, (TIGHT_CROP_STATE,)),
+]
+
+SIZES = (1, 12, 48)
+MODES = ("RGB", "RGBA", "L")
+
+# Times below this many seconds are only compared with this much slack,
+# timer noise dominates there
+MIN_SECONDS = 0.002
+
+def case_key(name, mode, megapixels):
+    return f"{name}/{mode}/{megapixels:g}MP"
+
+def _setup(size, mode):
+    return (make_image(size, mode),)
+
+def run_cases(cases, sizes, modes, repeats):
+    results = {}
+    for mp in sizes:
+        size = size_for(mp)
+        for mode in modes:
+            setup = partial(_setup, size, mode)
+            for name, func, args in cases:
+                key = case_key(name, mode, mp)
+                try:
+                    seconds, peak = measure(setup, partial(_call, func, args), repeats)
+                except Exception as e:
+                    # Some functions don't support every mode
+                    results[key] = {"error": f"{type(e).__name__}: {e}"}
+                    print(f"{key:>32}  error: {e}")
+                    continue
+                results[key] = {"seconds": seconds, "peak_bytes": peak}
+                print(f"{key:>32} {seconds * 1000:9.1f}ms {peak / 2**20:8.1f}MB")
+    return results
+
+def _call(func, args, image):
+    return func(image, *args)
+
+def compare(results, baseline, threshold, memory_threshold):
+    """Regressions of results against baseline, as printable lines"""
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if not base or "seconds" not in base or "seconds" not in result:
+            continue
+        limit = base["seconds"] * (1 + threshold) + MIN_SECONDS
+        if result["seconds"] > limit:
+            regressions.append(f"{key}: {base['seconds'] * 1000:.1f}ms -> {result['seconds'] * 1000:.1f}ms")
+        # Small peaks are mostly allocator noise, only compare from 1 MB up
+        memory_limit = max(base["peak_bytes"] * (1 + memory_threshold), 2**20)
+        if result["peak_bytes"] > memory_limit:
+            regressions.append(f"{key}: peak {base['peak_bytes'] / 2**20:.1f}MB -> {result['peak_bytes'] / 2**20:.1f}MB")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the processing functions")
+    parser.add_argument("--sizes", type=float, nargs="+", default=SIZES, help="megapixels (default: 1 12 48)")
+    parser.add_argument("--modes", nargs="+", default=MODES, choices=MODES)
+    parser.add_argument("--only", nargs="+", help="case names to run (default: all)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", default="bench_processing.json", help="results JSON")
+    parser.add_argument("--baseline", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="allowed slowdown vs baseline, 0.15 = 15%% (default)")
+    parser.add_argument("--memory-threshold", type=float, default=0.25,
+                        help="allowed peak memory growth vs baseline (default: 0.25)")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="write the results to --baseline instead of comparing")
+    args = parser.parse_args(argv)
+
+    cases = [case for case in CASES if not args.only or case[0] in args.only]
+    results = run_cases(cases, args.sizes, args.modes, args.repeats)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "pillow": PIL.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to {args.output}")
+
+    if not args.baseline:
+        return 0
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.threshold, args.memory_threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if regressions:
+        return 1
+    print("No regressions against the baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+# Micro-benchmark: PIL -> QPixmap conversion, temp.png round-trip vs in-memory QImage
+# Usage: python -m benchmarks.bench_qimage [repeats]
+import os
+import sys
+import tempfile
+import time
+
+from PIL import Image
+from PyQt5.QtGui import QPixmap
+from PyQt5.QtWidgets import QApplication
+
+from gui.qimage import pil_to_qimage
+
+SIZES = [(1280, 720), (1920, 1080), (3840, 2160)]
+MODES = ["RGB", "RGBA", "L"]
+
+def png_roundtrip(image, path):
+    # The old MemoryLensGUI.pil_to_pixmap
+    image.save(path)
+    pixmap = QPixmap(path)
+    os.remove(path)
+    return pixmap
+
+def in_memory(image):
+    return QPixmap.fromImage(pil_to_qimage(image))
+
+def time_call(func, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main(repeats=5):
+    app = QApplication.instance() or QApplication(sys.argv)
+    temp_path = os.path.join(tempfile.mkdtemp(), "temp.png")
+
+    print(f"{'size':>10} {'mode':>5} {'temp.png':>10} {'qimage':>10} {'wrap only':>10} {'speedup':>8}")
+    for w, h in SIZES:
+        for mode in MODES:
+            image = Image.effect_noise((w, h), 64).convert(mode)
+            old = time_call(lambda: png_roundtrip(image, temp_path), repeats)
+            new = time_call(lambda: in_memory(image), repeats)
+            wrap = time_call(lambda: pil_to_qimage(image), repeats)
+            print(f"{w}x{h:<5} {mode:>5} {old * 1000:8.1f}ms {new * 1000:8.1f}ms {wrap * 1000:8.1f}ms {old / new:7.1f}x")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
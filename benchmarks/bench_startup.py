@@ -0,0 +1,59 @@
+# Benchmark: cold start, from launching main.py to the first paint of the login page
+# Usage: python -m benchmarks.bench_startup [--runs 5] [--output startup.json]
+#
+# Launches `main.py --startup-benchmark` in a fresh interpreter each run (it
+# quits once the editor is ready). "spawn" times are measured from here,
+# from starting the process to reading each line, so they include
+# interpreter start-up; "in-process" times are what main.py reports from
+# its first line. Runs offscreen unless QT_QPA_PLATFORM is already set.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+
+def run_once():
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, MAIN, "--startup-benchmark"], cwd=os.path.dirname(MAIN),
+                               env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    times = {}
+    for line in process.stdout:
+        elapsed = time.perf_counter() - start
+        if line.startswith("Startup: login painted after"):
+            times["first_paint_spawn"] = elapsed
+            times["first_paint"] = float(line.split()[-2]) / 1000
+        elif line.startswith("Startup: editor ready after"):
+            times["editor_ready_spawn"] = elapsed
+            times["editor_ready"] = float(line.split()[-2]) / 1000
+    process.wait()
+    if len(times) != 4:
+        raise RuntimeError(f"main.py exited with {process.returncode} before reporting its start-up")
+    return times
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold start timings")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="results JSON")
+    args = parser.parse_args(argv)
+
+    runs = [run_once() for _ in range(args.runs)]
+    results = {}
+    print(f"{'':>26} {'min':>9} {'median':>9}")
+    for key, label in (("first_paint_spawn", "first paint"), ("editor_ready_spawn", "editor ready"),
+                       ("first_paint", "first paint (in-process)"), ("editor_ready", "editor ready (in-process)")):
+        values = [run[key] for run in runs]
+        results[key] = {"min": min(values), "median": statistics.median(values)}
+        print(f"{label:>26} {min(values) * 1000:7.0f}ms {statistics.median(values) * 1000:7.0f}ms")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"runs": args.runs, "results": results}, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
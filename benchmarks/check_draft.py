@@ -0,0 +1,85 @@
+# Check: photos shown from a reduced JPEG decode still export at full resolution
+# Usage: python -m benchmarks.check_draft
+#
+# Reduced JPEG decodes round their sides up (4001 wide at 1/2 is 2001), so
+# odd sizes are the edge case: open_draft() must report them as reduced,
+# and the editor must then export from the background full decode, not
+# from the draft, whether it decoded the photo itself or a folder
+# prefetch did (swiping to it). Runs offscreen unless QT_QPA_PLATFORM is already set.
+# Exit status 1 on any failure.
+import os
+import shutil
+import sys
+import tempfile
+
+from PIL import Image
+
+from storage.load_image import open_draft
+
+# (width, height) of the test JPEGs
+SIZES = [(4001, 3000), (3000, 4001), (4000, 3000)]
+MAX_SIDES = (600, 1100, 5000)
+
+def check_open_draft(path, size):
+    failures = []
+    for max_side in MAX_SIDES:
+        image, scale, _ = open_draft(path, max_side)
+        reduced = image.size != size
+        if reduced != (scale != 1):
+            failures.append(f"open_draft {size} for {max_side}: {image.size} reported as scale {scale}")
+    return failures
+
+def check_export(window, path, size, prefetch=False):
+    """Size a full render gets after load_photo(path), for each MAX_SIDES panel size
+
+    With prefetch, the photo is decoded by a PrefetchJob first, as for a
+    folder neighbour, and load_photo() takes it from the decode cache.
+    """
+    from gui.workers import ExportJob, PrefetchJob
+    failures = []
+    for max_side in MAX_SIDES:
+        # The preview decode is sized to the image panel (the window is never shown)
+        window.image_label.resize(max_side, max_side)
+        window.decode_cache.clear()
+        label = "after load_photo"
+        if prefetch:
+            window.folder_files, window.folder_index = [path], 0
+            job = PrefetchJob(path, window.proxy_max_side())
+            job.run()
+            window.on_prefetched(job)
+            if not window.decode_cache.get(path, window.proxy_max_side()):
+                failures.append(f"prefetch of {size} with a {max_side} px panel was not cached")
+            label = "after a prefetch"
+        window.load_photo(path)
+        render = window.full_render_task(ExportJob("check"))
+        result = render().size
+        if result != size:
+            failures.append(f"export of {size} {label} with a {max_side} px panel: {result}")
+    return failures
+
+def main():
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv)
+    from gui.interface import MemoryLensGUI
+
+    folder = tempfile.mkdtemp()
+    failures = []
+    try:
+        window = MemoryLensGUI()
+        for w, h in SIZES:
+            path = os.path.join(folder, f"photo_{w}x{h}.jpg")
+            Image.linear_gradient("L").resize((w, h)).convert("RGB").save(path, quality=90)
+            failures += check_open_draft(path, (w, h))
+            failures += check_export(window, path, (w, h))
+            failures += check_export(window, path, (w, h), prefetch=True)
+    finally:
+        shutil.rmtree(folder)
+
+    for failure in failures:
+        print(f"  FAIL {failure}")
+    print(f"{len(SIZES)} photos, {len(failures)} failures")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+# Check: fused_adjust against the sequential ImageEnhance chain it replaces
+# Usage: python -m benchmarks.check_fused [--cases 3000] [--seed 1]
+#
+# Runs random brightness/contrast/saturation/monochrome settings (each one
+# left neutral 30% of the time) on small synthetic images in L, RGB and
+# RGBA. Fails (exit status 1) if any value differs by more than
+# processing.fused.TOLERANCE, or if L images or brightness/contrast alone
+# are not exact.
+import argparse
+import random
+import sys
+from collections import Counter
+
+import numpy as np
+
+from benchmarks.common import make_image
+from processing.fused import TOLERANCE, _sequential, fused_adjust
+
+MODES = ("L", "RGB", "RGB", "RGBA")
+SIZE = (64, 48)
+
+def _setting(rng, low, high, neutral):
+    return neutral if rng.random() < 0.3 else round(rng.uniform(low, high), 2)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare fused_adjust with the sequential steps")
+    parser.add_argument("--cases", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    images = {mode: make_image(SIZE, mode) for mode in set(MODES)}
+    case_max = Counter()
+    values = Counter()
+    failures = []
+    for _ in range(args.cases):
+        mode = rng.choice(MODES)
+        settings = (_setting(rng, 0.3, 2.0, 1.0), _setting(rng, 0.3, 2.0, 1.0),
+                    _setting(rng, 0.0, 2.5, 1.0), _setting(rng, 0.0, 1.0, 0.0))
+        image = images[mode]
+        expected = np.asarray(_sequential(image, *settings, None), dtype=np.int16)
+        actual = np.asarray(fused_adjust(image, *settings), dtype=np.int16)
+        if expected.shape != actual.shape:
+            failures.append(f"{mode} {settings}: shape {actual.shape}, expected {expected.shape}")
+            continue
+        diff = np.abs(expected - actual)
+        values.update(diff.ravel().tolist())
+        worst = int(diff.max())
+        case_max[worst] += 1
+        exact = mode == "L" or settings[2:] == (1.0, 0.0)
+        if worst > (0 if exact else TOLERANCE):
+            failures.append(f"{mode} {settings}: differs by {worst}")
+
+    total = sum(values.values())
+    print(f"{args.cases} cases, tolerance {TOLERANCE}")
+    print("largest difference per case: " + ", ".join(f"{d}: {n}" for d, n in sorted(case_max.items())))
+    print("values: " + ", ".join(f"{d}: {n / total:.2%}" for d, n in sorted(values.items())))
+    for failure in failures:
+        print(f"  FAIL {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+# Shared helpers for the benchmark scripts
+import multiprocessing
+import sys
+import time
+
+from PIL import Image
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+def make_image(size, mode="RGB", seed=0):
+    """Synthetic photo-like test image (smooth gradients plus noise)"""
+    w, h = size
+    gradient = Image.linear_gradient("L").resize((w, h))
+    noise = Image.effect_noise((w, h), 40)
+    r = gradient
+    g = gradient.transpose(Image.ROTATE_90).resize((w, h))
+    b = Image.blend(gradient, noise, 0.5)
+    image = Image.merge("RGB", (r, g, b))
+    if mode != "RGB":
+        image = image.convert(mode)
+    return image
+
+def size_for(megapixels):
+    """4:3 image size with about megapixels million pixels"""
+    w = int((megapixels * 1e6 * 4 / 3) ** 0.5)
+    return (w, int(w * 3 / 4))
+
+def _max_rss_bytes():
+    """Peak RSS of this process, 0 if it can't be read (Windows without psutil)"""
+    if resource is not None:
+        # ru_maxrss is in KiB on Linux, bytes on macOS
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == "darwin" else rss * 1024
+    if psutil is not None:
+        # Peak working set on Windows
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss)
+    return 0
+
+def _proc_status_bytes(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) * 1024
+    raise OSError(field)
+
+def _reset_peak():
+    """Start a new peak RSS window, returns (current RSS, peak reader)
+
+    On Linux the high-water mark can be reset, so temporaries of setup()
+    don't hide the measured call's peak. Elsewhere the process peak is used
+    (ru_maxrss, or psutil's peak working set on Windows).
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return _proc_status_bytes("VmRSS"), lambda: _proc_status_bytes("VmHWM")
+    except OSError:
+        return _max_rss_bytes(), _max_rss_bytes
+
+def _child(conn, setup, func, repeats):
+    try:
+        args = setup()
+        # Peak memory from the first call, before anything else raises the high-water mark
+        before, read_peak = _reset_peak()
+        start = time.perf_counter()
+        func(*args)
+        best = time.perf_counter() - start
+        peak = max(0, read_peak() - before)
+        for _ in range(repeats - 1):
+            start = time.perf_counter()
+            func(*args)
+            best = min(best, time.perf_counter() - start)
+        conn.send((best, peak))
+    except Exception as e:
+        conn.send(e)
+    conn.close()
+
+def measure(setup, func, repeats=3):
+    """Time func(*setup()) and its peak memory growth in a fresh process
+
+    setup builds the inputs inside the child so they are not counted.
+    Returns (best wall time in seconds, peak RSS increase in bytes).
+    Peak RSS includes Pillow's C allocations, which tracemalloc can't see,
+    it is 0 on Windows without psutil. Exceptions raised in the child are
+    raised again here. Where fork is not available (Windows) the child is
+    spawned, so setup and func must be picklable (module-level functions
+    or partials of them).
+    """
+    methods = multiprocessing.get_all_start_methods()
+    ctx = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+    parent_conn, child_conn = ctx.Pipe()
+    proc = ctx.Process(target=_child, args=(child_conn, setup, func, repeats))
+    proc.start()
+    child_conn.close()  # recv() then fails instead of waiting if the child dies
+    try:
+        result = parent_conn.recv()
+    except EOFError:
+        raise RuntimeError(f"benchmark process exited with {proc.exitcode}") from None
+    finally:
+        proc.join()
+    if isinstance(result, Exception):
+        raise result
+    return result
@@ -0,0 +1,209 @@
+from PyQt5.QtWidgets import *
+from PyQt5.QtGui import *
+from PyQt5.QtCore import *
+from collections import OrderedDict
+import os
+
+from gui.workers import ThumbnailJob, AlbumScanJob
+from storage.thumbnail_cache import ThumbnailCache
+
+THUMB_SIZE = 160
+MEMORY_THUMBS = 2000  # Decoded thumbnails kept as pixmaps (LRU)
+PREFETCH_ROWS = 40  # Rows beyond the visible ones that may still be decoded
+
+
+class AlbumModel(QAbstractListModel):
+    """Album items for a QListView, thumbnails are loaded only when asked for
+
+    The view only asks for the decoration of visible items, so opening a
+    huge album decodes nothing up front. Thumbnails come from the SQLite
+    cache when the file is unchanged, otherwise they are generated on the
+    thread pool and written back to the cache in batches.
+    """
+
+    def __init__(self, cache, parent=None):
+        super().__init__(parent)
+        self.cache = cache
+        self.items = []
+        self.rows = {}  # path -> row
+        self.pixmaps = OrderedDict()  # (thumb_source, size, mtime) -> QPixmap
+        self.requested = set()
+        self.visible = (0, 0)
+        self.generated = 0
+        self.pending_writes = []
+        self.closed = False
+
+        self.pool = QThreadPool(self)
+        self.placeholder = QPixmap(THUMB_SIZE, THUMB_SIZE)
+        self.placeholder.fill(QColor("#FCEDF2"))
+
+        # Cache writes are batched into one transaction
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.setInterval(500)
+        self.flush_timer.timeout.connect(self.flush_cache)
+
+    def set_items(self, items):
+        self.beginResetModel()
+        self.items = items
+        self.rows = {item.path: row for row, item in enumerate(items)}
+        self.endResetModel()
+        # Forget thumbnails of deleted files
+        self.cache.remove_missing(item.thumb_source for item in items)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.items)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        item = self.items[index.row()]
+        if role == Qt.DisplayRole:
+            return os.path.basename(item.path)
+        if role == Qt.DecorationRole:
+            return self.thumbnail(index.row(), item)
+        if role == Qt.ToolTipRole:
+            return item.path
+        if role == Qt.UserRole:
+            return item
+        return None
+
+    def set_visible_rows(self, first, last):
+        self.visible = (first, last)
+
+    def is_wanted(self, row):
+        first, last = self.visible
+        return first - PREFETCH_ROWS <= row <= last + PREFETCH_ROWS
+
+    def thumbnail(self, row, item):
+        key = (item.thumb_source, item.size, item.mtime)
+        pixmap = self.pixmaps.get(key)
+        if pixmap is not None:
+            self.pixmaps.move_to_end(key)
+            return pixmap
+        if key not in self.requested:
+            self.requested.add(key)
+            job = ThumbnailJob(item, THUMB_SIZE, self.cache.get(*key))
+            # Skip the work if the user scrolled away before the job started
+            job.is_wanted = lambda row=row: self.is_wanted(row)
+            job.signals.ready.connect(self.on_thumbnail_ready)
+            job.signals.failed.connect(self.on_thumbnail_failed)
+            job.signals.skipped.connect(self.on_thumbnail_skipped)
+            self.pool.start(job)
+        return self.placeholder
+
+    def _store(self, item, pixmap):
+        key = (item.thumb_source, item.size, item.mtime)
+        self.requested.discard(key)
+        self.pixmaps[key] = pixmap
+        while len(self.pixmaps) > MEMORY_THUMBS:
+            self.pixmaps.popitem(last=False)
+        row = self.rows.get(item.path)
+        if row is not None:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+    def on_thumbnail_ready(self, item, qimage, data):
+        if self.closed:
+            return  # Queued before shutdown(), the cache may be closed already
+        if data is not None:
+            self.generated += 1
+            self.pending_writes.append((item.thumb_source, item.size, item.mtime, data))
+            self.flush_timer.start()
+        self._store(item, QPixmap.fromImage(qimage))
+
+    def on_thumbnail_failed(self, item):
+        # Keep the placeholder so broken files are not retried on every paint
+        self._store(item, self.placeholder)
+
+    def on_thumbnail_skipped(self, item):
+        self.requested.discard((item.thumb_source, item.size, item.mtime))
+
+    def flush_cache(self):
+        if self.pending_writes and not self.closed:
+            self.cache.put_many(self.pending_writes)
+            self.pending_writes = []
+
+    def shutdown(self):
+        """Stop thumbnail jobs and write the pending thumbnails, call before closing the cache"""
+        if self.closed:
+            return
+        self.flush_timer.stop()
+        self.pool.clear()  # Jobs not started yet
+        self.pool.waitForDone()
+        self.flush_cache()
+        self.closed = True
+
+
+class AlbumBrowser(QDialog):
+    """Grid of album items, double-click opens one in the editor"""
+    item_opened = pyqtSignal(object)  # AlbumItem
+
+    def __init__(self, album_path, cache_path, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Album")
+        self.resize(900, 650)
+        self.album_path = album_path
+
+        self.cache = ThumbnailCache(cache_path)
+        self.model = AlbumModel(self.cache, self)
+
+        self.view = QListView()
+        self.view.setViewMode(QListView.IconMode)
+        self.view.setResizeMode(QListView.Adjust)
+        self.view.setMovement(QListView.Static)
+        self.view.setUniformItemSizes(True)
+        self.view.setLayoutMode(QListView.Batched)
+        self.view.setBatchSize(500)
+        self.view.setIconSize(QSize(THUMB_SIZE, THUMB_SIZE))
+        self.view.setGridSize(QSize(THUMB_SIZE + 20, THUMB_SIZE + 40))
+        self.view.setModel(self.model)
+        self.view.doubleClicked.connect(self.open_index)
+        self.view.verticalScrollBar().valueChanged.connect(self.update_visible_rows)
+
+        self.status_label = QLabel("Scanning album...")
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.view)
+        layout.addWidget(self.status_label)
+        self.setLayout(layout)
+
+        self.scan_pool = QThreadPool(self)
+        self.rescan()
+
+    def rescan(self):
+        job = AlbumScanJob(self.album_path)
+        job.signals.finished.connect(self.on_scan_finished)
+        self.scan_pool.start(job)
+
+    def on_scan_finished(self, items):
+        if self.model.closed:
+            return
+        self.model.set_items(items)
+        self.status_label.setText(f"{len(items)} items")
+        QTimer.singleShot(0, self.update_visible_rows)
+
+    def update_visible_rows(self, *args):
+        # Uniform grid: the first visible cell plus one screenful of cells
+        viewport = self.view.viewport().rect()
+        grid = self.view.gridSize()
+        first = self.view.indexAt(viewport.topLeft() + QPoint(5, 5))
+        first_row = first.row() if first.isValid() else 0
+        columns = max(1, viewport.width() // grid.width())
+        rows = viewport.height() // grid.height() + 2
+        self.model.set_visible_rows(first_row, first_row + columns * rows)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_visible_rows()
+
+    def open_index(self, index):
+        self.item_opened.emit(index.data(Qt.UserRole))
+        self.accept()
+
+    def done(self, result):
+        # Nothing may touch the cache once it is closed
+        self.scan_pool.waitForDone()
+        self.model.shutdown()
+        self.cache.close()
+        super().done(result)
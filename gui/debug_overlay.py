@@ -0,0 +1,21 @@
+from PyQt5.QtWidgets import QLabel
+from PyQt5.QtGui import QFontDatabase
+from PyQt5.QtCore import Qt
+
+
+class DebugOverlay(QLabel):
+    """Render timing text drawn over the image panel (see processing.profiling)"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.setStyleSheet("background-color: rgba(0, 0, 0, 170); color: #7CFC8A; padding: 6px; border-radius: 6px;")
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.setTextFormat(Qt.PlainText)
+        self.hide()
+
+    def show_profile(self, profiler):
+        self.setText(profiler.summary())
+        self.adjustSize()
+        self.move(10, 10)
+        self.raise_()
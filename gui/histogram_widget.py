@@ -0,0 +1,46 @@
+from PyQt5.QtWidgets import QWidget, QSizePolicy
+from PyQt5.QtGui import QPainter, QPainterPath, QColor, QPen
+from PyQt5.QtCore import QPointF
+
+# (histogram row, fill colour)
+CURVES = [
+    (3, QColor(120, 120, 120, 110)),  # Luma, filled underneath
+    (0, QColor(230, 60, 80, 150)),
+    (1, QColor(60, 180, 90, 150)),
+    (2, QColor(70, 110, 230, 150)),
+]
+
+
+class HistogramWidget(QWidget):
+    """RGB + luma histogram of the preview (processing.histogram.frame_histogram)"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.histogram = None
+        self.setMinimumSize(180, 90)
+        self.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Fixed)
+        self.setStyleSheet("background-color: white; border-radius: 8px;")
+
+    def set_histogram(self, histogram):
+        self.histogram = histogram
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.fillRect(self.rect(), QColor("#FFFFFF"))
+        if self.histogram is None:
+            return
+
+        w, h = self.width(), self.height() - 4
+        # Scale by the tallest inner bin, clipped blacks/whites would flatten the rest
+        peak = max(1, self.histogram[:, 1:255].max())
+        for row, color in CURVES:
+            path = QPainterPath(QPointF(0, h))
+            for value, count in enumerate(self.histogram[row]):
+                path.lineTo(value * w / 255, h - min(1.0, count / peak) * (h - 2))
+            path.lineTo(w, h)
+            path.closeSubpath()
+            painter.setPen(QPen(color.darker(120), 1))
+            painter.setBrush(color)
+            painter.drawPath(path)
@@ -1,23 +1,27 @@
 from PyQt5.QtWidgets import *
 from PyQt5.QtGui import *
 from PyQt5.QtCore import *
-from PIL import Image, ImageEnhance, ImageFilter  # Untuk pemrosesan gambar
-import os
 import os
 
 # Import modul dari folder lain (pastikan path benar)
-from processing.brightness import adjust_brightness
-from processing.contrast import adjust_contrast
-from processing.saturation import adjust_saturation
-from processing.monochrome import apply_monochrome
-from processing.sharpen import apply_sharpen
-from storage.save_image import save_to_album
-from storage.compress import compress_image
-from processing.geometry import apply_rotate, apply_flip
-from processing.filters import (
-    apply_neutral_filter, apply_warm_filter, apply_cold_filter,
-    apply_vintage_filter, apply_bw_filter
-)
+from storage.album import save_entry, load_entry, entry_render_path, is_render_stale, ensure_render
+from storage.load_image import open_draft, list_images
+from storage.save_image import write_image, write_bytes
+from storage.compress import compress_to_size
+from processing.filters import FILTERS
+from processing.pipeline import make_proxy, build_stages
+from processing.pyramid import build_pyramid, nearest_level, level_index
+from processing.buffers import reserve_pillow_blocks
+from processing.tiling import FrameLayout, render_full_resolution, visible_tiles
+from gui.qimage import pil_to_pixmap
+from gui.workers import RenderScheduler, TileScheduler, ImageLoadJob, PrefetchJob, ExportJob
+from gui.render_cache import RenderCache, ScaledPixmapCache, TileCache, DecodeCache, state_key
+from gui.album_browser import AlbumBrowser
+from gui.debug_overlay import DebugOverlay
+from gui.histogram_widget import HistogramWidget
+from processing.profiling import Profiler
+from processing.histogram import frame_histogram
+import settings
 
 
 # Custom Label for Selection and Swipe
@@ -25,6 +29,9 @@ class SelectableLabel(QLabel):
     selection_made = pyqtSignal(QRect)
     swipe_left = pyqtSignal()
     swipe_right = pyqtSignal()
+    zoom_requested = pyqtSignal(float, QPoint)  # factor, around this point
+    zoom_reset = pyqtSignal()
+    pan_moved = pyqtSignal(QPoint)  # drag distance since the last move
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -32,6 +39,7 @@ class SelectableLabel(QLabel):
         self.end_pos = None
         self.is_selecting = False
         self.crop_mode = False
+        self.zoomed = False  # Dragging pans instead of swiping
         self.swipe_threshold = 50  # Minimum pixels for swipe detection
 
     def mousePressEvent(self, event):
@@ -46,6 +54,18 @@ class SelectableLabel(QLabel):
         if self.is_selecting:
             self.end_pos = event.pos()
             self.update()
+        elif self.zoomed and self.start_pos:
+            self.pan_moved.emit(event.pos() - self.end_pos)
+            self.end_pos = event.pos()
+
+    def mouseDoubleClickEvent(self, event):
+        if not self.crop_mode:
+            self.zoom_reset.emit()
+
+    def wheelEvent(self, event):
+        steps = event.angleDelta().y() / 120
+        if steps and not self.crop_mode:
+            self.zoom_requested.emit(1.25 ** steps, event.pos())
 
     def mouseReleaseEvent(self, event):
         if event.button() == Qt.LeftButton and self.start_pos:
@@ -56,7 +76,7 @@ class SelectableLabel(QLabel):
             dy = self.end_pos.y() - self.start_pos.y()
             
             # Check if it's a horizontal swipe (not crop)
-            if not self.crop_mode and abs(dx) > self.swipe_threshold and abs(dx) > abs(dy) * 2:
+            if not self.crop_mode and not self.zoomed and abs(dx) > self.swipe_threshold and abs(dx) > abs(dy) * 2:
                 # Horizontal swipe detected
                 if dx > 0:
                     self.swipe_right.emit()
@@ -91,9 +111,18 @@ class MemoryLensGUI(QMainWindow):
         self.setWindowTitle("MemoryLens")
         
         # Atribut initialized EARLY to prevent resizeEvent crash
-        self.original_image = None 
-        self.current_image = None
+        self.original_image = None  # Full resolution, None while still decoding
+        self.draft_image = None  # Reduced JPEG decode, stands in until the original is ready
+        self.pyramid = None  # Mipmap levels of the best decode so far, proxies start from these
+        self.full_load_job = None
+        self.full_load_pending = False  # full_load_job waits for FULL_LOAD_DELAY_MS
+        self.proxy_image = None  # Downscaled working copy for interactive edits
+        self.coarse_image = None  # Smaller still, for frames while a slider is dragged
+        self.current_image = None  # Preview render (proxy resolution)
         self.current_pixmap = None
+        self.source_path = None  # File the original was loaded from
+        self.album_entry = None  # Sidecar path when editing an album item
+        self.proxy_scale = settings.PROXY_SCALE
         
         # --- GLOBAL STYLESHEET ---
         self.setStyleSheet("""
@@ -146,18 +175,67 @@ class MemoryLensGUI(QMainWindow):
         self.flip_v = False
         
         # Filter State
-        self.filters = [
-            ("Neutral", apply_neutral_filter),
-            ("Warm", apply_warm_filter),
-            ("Cold", apply_cold_filter),
-            ("Vintage", apply_vintage_filter),
-            ("Black & White", apply_bw_filter)
-        ]
+        self.filters = list(FILTERS)
         self.current_filter_index = 0  # Start with Neutral
         
         # Crop State
-        self.crop_box = None # (left, top, right, bottom) normalized to current geometry
+        self.crop_box = None # (left, top, right, bottom) normalized 0-1 to current geometry
         
+        # Background rendering (latest slider state wins)
+        self.render_scheduler = RenderScheduler(self, settings.render_workers(), settings.PARALLEL_MIN_PIXELS,
+                                                settings.HISTOGRAM_SAMPLE_PIXELS)
+        self.render_scheduler.rendered.connect(self.on_render_finished)
+        self.render_scheduler.failed.connect(self.on_render_failed)
+
+        # Progressive preview: coarse frames while dragging, the proxy-resolution
+        # frame once input has been idle for a moment
+        self.refine_timer = QTimer(self)
+        self.refine_timer.setSingleShot(True)
+        self.refine_timer.setInterval(settings.REFINE_DELAY_MS)
+        self.refine_timer.timeout.connect(lambda: self.apply_filters(refine=True))
+
+        # Zoomed-in view: only the visible tiles of the nearest mipmap level render
+        self.zoom = None  # Screen pixels per photo pixel, None = fit to the panel
+        self.view_center = (0.5, 0.5)  # Normalized, in the edited frame
+        self.tile_cache = TileCache(settings.TILE_CACHE_BUDGET)
+        self.tile_scheduler = TileScheduler(self, settings.render_workers())
+        self.tile_scheduler.tile_ready.connect(self.on_tile_ready)
+        self.tile_scheduler.failed.connect(self.on_render_failed)
+        # Tiles arriving together are drawn in one go
+        self.viewport_timer = QTimer(self)
+        self.viewport_timer.setSingleShot(True)
+        self.viewport_timer.setInterval(0)
+        self.viewport_timer.timeout.connect(self.update_display)
+
+        # Background decoding. Never use QThreadPool.globalInstance() for Python
+        # jobs: Qt's smooth scaling runs on it while holding the GIL (deadlock)
+        self.load_pool = QThreadPool(self)
+        self.full_load_timer = QTimer(self)
+        self.full_load_timer.setSingleShot(True)
+        self.full_load_timer.setInterval(settings.FULL_LOAD_DELAY_MS)
+        self.full_load_timer.timeout.connect(self.start_full_load)
+
+        # Folder browsing: photos next to the current one are decoded ahead
+        self.folder_files = []  # Empty unless opened with Open Folder
+        self.folder_index = 0
+        self.decode_cache = DecodeCache(settings.DECODE_CACHE_BUDGET)
+        self.prefetch_pool = QThreadPool(self)
+        self.prefetch_pool.setMaxThreadCount(1)
+        self.prefetching = set()  # Paths with a PrefetchJob queued or running
+
+        # Full-resolution save/export, one at a time so several can be queued
+        self.export_pool = QThreadPool(self)
+        self.export_pool.setMaxThreadCount(1)
+        self.export_jobs = []
+
+        # Rendered previews by edit state (undo/redo hits skip rendering)
+        self.render_cache = RenderCache(settings.RENDER_CACHE_BUDGET)
+        # Panel-sized copies of recent frames (resizing back and forth, redraws)
+        self.display_cache = ScaledPixmapCache()
+
+        # Render timing, None unless the debug overlay is on (F12)
+        self.profiler = None
+
         # Undo/Redo Stacks
         self.undo_stack = []
         self.redo_stack = []
@@ -171,9 +249,20 @@ class MemoryLensGUI(QMainWindow):
         self.image_label.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)
         # Style handles by Global Stylesheet (QLabel)
         self.image_label.selection_made.connect(self.handle_crop_selection)
-        self.image_label.swipe_left.connect(self.next_filter)
-        self.image_label.swipe_right.connect(self.prev_filter)
-
+        self.image_label.swipe_left.connect(self.swipe_next)
+        self.image_label.swipe_right.connect(self.swipe_prev)
+        QShortcut(QKeySequence("PgDown"), self, lambda: self.show_folder_photo(self.folder_index + 1))
+        QShortcut(QKeySequence("PgUp"), self, lambda: self.show_folder_photo(self.folder_index - 1))
+        self.image_label.zoom_requested.connect(self.zoom_by)
+        self.image_label.zoom_reset.connect(self.zoom_to_fit)
+        self.image_label.pan_moved.connect(self.pan_view)
+        QShortcut(QKeySequence("Ctrl+0"), self, self.zoom_to_fit)
+        QShortcut(QKeySequence("Ctrl+1"), self, lambda: self.set_zoom(1.0))
+
+        # Render timing overlay: F12 toggles, Ctrl+Shift+T exports a trace
+        self.debug_overlay = DebugOverlay(self.image_label)
+        QShortcut(QKeySequence("F12"), self, self.toggle_debug_overlay)
+        QShortcut(QKeySequence("Ctrl+Shift+T"), self, self.export_render_trace)
 
         # Tombol Upload - will be added to layout below image
         self.upload_btn = QPushButton("Upload Photo")
@@ -195,6 +284,11 @@ class MemoryLensGUI(QMainWindow):
         self.upload_btn.setCursor(Qt.PointingHandCursor)
         self.upload_btn.setVisible(True)  # Explicitly show initially
 
+        # Open a whole folder, then swipe (or PgUp/PgDown) through it
+        self.folder_btn = QPushButton("Open Folder")
+        self.folder_btn.clicked.connect(self.open_folder)
+        self.folder_btn.setCursor(Qt.PointingHandCursor)
+
         # --- Filter Navigation UI (overlaid on image) ---
         # Left Arrow Button
         self.filter_left_btn = QPushButton("◄", self.image_label)
@@ -400,6 +494,10 @@ class MemoryLensGUI(QMainWindow):
         sliders_layout.addWidget(self.mono_widget)
         sliders_layout.addWidget(self.sharp_widget)
 
+        # Live histogram of the preview
+        self.histogram_widget = HistogramWidget()
+        sliders_layout.addWidget(self.histogram_widget)
+
         # --- Geometry & Tools ---
         geo_layout = QHBoxLayout()
         
@@ -453,6 +551,10 @@ class MemoryLensGUI(QMainWindow):
             }
         """)
         
+        open_album_btn = QPushButton("Open from Album")
+        open_album_btn.clicked.connect(self.show_album_browser)
+        
+        action_layout.addWidget(open_album_btn)
         action_layout.addWidget(save_btn)
         action_layout.addWidget(btn_export)
         
@@ -473,6 +575,7 @@ class MemoryLensGUI(QMainWindow):
         upload_layout = QHBoxLayout()
         upload_layout.addStretch()
         upload_layout.addWidget(self.upload_btn)
+        upload_layout.addWidget(self.folder_btn)
         upload_layout.addStretch()
         main_layout.addLayout(upload_layout)
         
@@ -485,6 +588,17 @@ class MemoryLensGUI(QMainWindow):
         container.setLayout(main_layout)
         self.setCentralWidget(container)
 
+        # Export progress (status bar), visible while saves/exports run
+        self.export_progress = QProgressBar()
+        self.export_progress.setRange(0, 100)
+        self.export_progress.setValue(0)
+        self.export_progress.setFixedWidth(300)
+        self.export_cancel_btn = QPushButton("Cancel")
+        self.export_cancel_btn.clicked.connect(self.cancel_exports)
+        self.statusBar().addPermanentWidget(self.export_progress)
+        self.statusBar().addPermanentWidget(self.export_cancel_btn)
+        self.update_export_ui()
+
 
     # --- UNDO / REDO SYSTEM ---
     def get_current_state(self):
@@ -564,6 +678,8 @@ class MemoryLensGUI(QMainWindow):
 
 
     def toggle_crop_mode(self, checked):
+        if checked:
+            self.zoom_to_fit()  # Selections are mapped on the fitted view
         self.image_label.crop_mode = checked
         if checked:
             self.btn_crop_mode.setText("Crop Pattern: Draw Box")
@@ -573,7 +689,7 @@ class MemoryLensGUI(QMainWindow):
             self.image_label.setCursor(Qt.ArrowCursor)
 
     def reset_all(self):
-        if not self.original_image: return
+        if not self.proxy_image: return
         
         self.save_undo_state() # Save before reset all
         
@@ -615,33 +731,29 @@ class MemoryLensGUI(QMainWindow):
         displayed_w = displayed_pixmap.width()
         displayed_h = displayed_pixmap.height()
         
-        # Get the actual current image size (before display scaling)
-        img_w, img_h = self.current_image.size
-        
         if displayed_w == 0 or displayed_h == 0: return
 
         # Calculate offsets (image is centered in label)
         offset_x = (label_w - displayed_w) / 2
         offset_y = (label_h - displayed_h) / 2
         
-        # Calculate scale from displayed to actual image
-        scale_x = img_w / displayed_w
-        scale_y = img_h / displayed_h
-        
-        # Map rect to actual image coordinates
-        x_start = (rect.x() - offset_x) * scale_x
-        y_start = (rect.y() - offset_y) * scale_y
-        w_sel = rect.width() * scale_x
-        h_sel = rect.height() * scale_y
+        # Map rect to normalized coordinates of the displayed image,
+        # so the box is valid at proxy and full resolution alike
+        left = max(0.0, (rect.x() - offset_x) / displayed_w)
+        top = max(0.0, (rect.y() - offset_y) / displayed_h)
+        right = min(1.0, (rect.x() + rect.width() - offset_x) / displayed_w)
+        bottom = min(1.0, (rect.y() + rect.height() - offset_y) / displayed_h)
         
-        # Bound/Clamp to image boundaries
-        x = max(0, int(x_start))
-        y = max(0, int(y_start))
-        w = min(img_w - x, int(w_sel))
-        h = min(img_h - y, int(h_sel))
+        # Compose with an existing crop (selection is relative to it)
+        if self.crop_box:
+            c_left, c_top, c_right, c_bottom = self.crop_box
+            c_w = c_right - c_left
+            c_h = c_bottom - c_top
+            left, right = c_left + left * c_w, c_left + right * c_w
+            top, bottom = c_top + top * c_h, c_top + bottom * c_h
         
-        if w > 10 and h > 10:
-            self.crop_box = (x, y, x+w, y+h)
+        if rect.width() > 10 and rect.height() > 10 and right > left and bottom > top:
+            self.crop_box = (left, top, right, bottom)
             self.apply_filters()
             
             # Turn off crop mode after successful crop
@@ -650,9 +762,72 @@ class MemoryLensGUI(QMainWindow):
 
     # ADDED: Implement resizeEvent to re-scale image when window size changes
     def resizeEvent(self, event):
+        if self.proxy_needs_rebuild():
+            self.build_proxy()
+            self.apply_filters()
         self.update_display()
         self.position_filter_ui()
         super().resizeEvent(event)
+
+    # --- PREVIEW PROXY ---
+    def proxy_max_side(self):
+        # Long edge of the panel, so the proxy also covers 90 degree rotations
+        label_side = max(self.image_label.width(), self.image_label.height())
+        return max(1, int(label_side * self.proxy_scale))
+
+    def proxy_source(self):
+        # Best decode available so far, at the smallest mipmap level still large enough
+        return nearest_level(self.pyramid, self.proxy_max_side())
+
+    def proxy_needs_rebuild(self):
+        if not self.proxy_image:
+            return False
+        if max(self.proxy_image.size) >= max(self.pyramid[0].size):
+            return False  # Already as large as the source allows
+        return max(self.proxy_image.size) < self.proxy_max_side()
+
+    def coarse_max_side(self):
+        label_side = max(self.image_label.width(), self.image_label.height())
+        return max(1, int(label_side * settings.COARSE_PREVIEW_SCALE))
+
+    def build_proxy(self, proxy=None):
+        # proxy: already made for the current panel (prefetched), else made here
+        self.proxy_image = proxy or make_proxy(self.proxy_source(), self.proxy_max_side())
+        self.coarse_image = make_proxy(self.proxy_image, self.coarse_max_side())
+        self.render_cache.clear()  # Cached renders belong to the old proxy
+        self.tile_cache.clear()  # Tiles too (their contrast means come from it)
+        self.tile_scheduler.clear()
+        # Renders at this size reuse freed Pillow memory and pooled QImage buffers
+        w, h = self.proxy_image.size
+        reserve_pillow_blocks(w * h * 4, settings.RENDER_BUFFER_FRAMES)
+        self.render_scheduler.buffers.clear()
+
+    def full_render_task(self, job):
+        """Snapshot of the current edit as a render function for an export job
+
+        Call on the GUI thread. Editing can continue (or another photo can
+        be opened) while the returned function runs on the worker thread.
+        """
+        original = self.original_image
+        load_job = self.full_load_job
+        if load_job is not None:
+            load_job.is_wanted = lambda: True  # Even if another photo is opened meanwhile
+            self.start_full_load()
+        state = self.get_current_state()
+        filters = list(self.filters)
+
+        def render_full():
+            # Full chain on the original, only used for save/export
+            source = original if original is not None else load_job.wait()
+            return render_full_resolution(
+                source, state, filters,
+                tiled_min_pixels=settings.TILED_RENDER_MIN_PIXELS,
+                memory_budget=settings.TILE_MEMORY_BUDGET,
+                workers=settings.render_workers(),
+                should_cancel=job.is_cancelled,
+                progress=lambda f: job.report(0.9 * f)  # Leave the last 10% for encoding
+            )
+        return render_full
     
     def position_filter_ui(self):
         """Position filter navigation buttons and label on image"""
@@ -690,48 +865,238 @@ class MemoryLensGUI(QMainWindow):
         file, _ = QFileDialog.getOpenFileName(self, "Select Image", "", "Images (*.jpg *.png *.jpeg)")
         if file:
             try:
-                self.original_image = Image.open(file)
-                self.current_image = self.original_image.copy()
-                self.current_pixmap = QPixmap(file)
-                
-                # Reset sliders and states
-                self.undo_stack.clear() # Clear undo on new image
-                self.redo_stack.clear()
-                self.update_undo_buttons()
-                
-                self.block_signals(True)
-                self.bright_slider.setValue(100)
-                self.contrast_slider.setValue(100)
-                self.sat_slider.setValue(100)
-                self.mono_slider.setValue(0)
-                self.sharp_slider.setValue(0)
-                self.block_signals(False)
-                
-                self.rotation = 0
-                self.flip_h = False
-                self.flip_v = False
-                self.crop_box = None
-                self.current_filter_index = 0  # Reset to Neutral filter
-
-                # Show filter UI elements
-                self.filter_left_btn.show()
-                self.filter_right_btn.show()
-                self.filter_name_label.setText(self.filters[0][0])  # "Neutral"
-                self.filter_name_label.show()
-                
-                # Show undo/redo icon buttons
-                self.undo_icon_btn.show()
-                self.redo_icon_btn.show()
-                
-                self.position_filter_ui()
-
-                # Keep upload button visible so user can upload new photos anytime
-                # self.upload_btn.setVisible(False)  # Commented out - button stays visible
-                
-                self.update_display()
+                self.folder_files = []
+                self.load_photo(file)
             except Exception as e:
                 QMessageBox.warning(self, "Error", f"Failed to load image: {str(e)}")
 
+    def load_photo(self, file):
+        self.render_scheduler.cancel()
+        self.source_path = file
+        self.album_entry = None  # Set again by open_album_entry
+        self.full_load_job = None
+        self.full_load_pending = False
+        self.full_load_timer.stop()
+        self.reset_zoom()
+
+        # Single decode: JPEGs are decoded reduced (1/2 - 1/8) for display and
+        # the full resolution is decoded in the background for save/export.
+        # Folder neighbours were decoded (and their proxies made) ahead of time.
+        cached = self.decode_cache.get(file, self.proxy_max_side())
+        if cached:
+            decoded, self.pyramid, proxy = cached
+            timing = "from the prefetch cache"
+        else:
+            decoded, proxy = open_draft(file, self.proxy_max_side()), None
+            self.pyramid = build_pyramid(decoded[0])
+            timing = f"in {decoded[2] * 1000:.0f} ms"
+        image, scale, seconds = decoded
+        if scale == 1:
+            self.original_image, self.draft_image = image, None
+            self.statusBar().showMessage(f"Decoded {timing}")
+        else:
+            self.original_image, self.draft_image = None, image
+            job = ImageLoadJob(file)
+            # Skipped if another photo is opened before it starts
+            job.is_wanted = lambda: job is self.full_load_job
+            job.signals.loaded.connect(self.on_full_image_loaded)
+            job.signals.failed.connect(self.on_full_image_failed)
+            self.full_load_job = job
+            self.full_load_pending = True
+            self.full_load_timer.start()
+            self.statusBar().showMessage(f"Preview decoded at 1/{scale} {timing}, loading full resolution...")
+        self.build_proxy(proxy)
+        if not cached:
+            self.decode_cache.put(file, self.proxy_max_side(), decoded, self.pyramid, self.proxy_image)
+        self.current_image = self.proxy_image
+        self.current_pixmap = self.pil_to_pixmap(self.proxy_image)
+        self.histogram_widget.set_histogram(frame_histogram(self.proxy_image, settings.HISTOGRAM_SAMPLE_PIXELS))
+        
+        # Reset sliders and states
+        self.undo_stack.clear() # Clear undo on new image
+        self.redo_stack.clear()
+        self.update_undo_buttons()
+        
+        self.block_signals(True)
+        self.bright_slider.setValue(100)
+        self.contrast_slider.setValue(100)
+        self.sat_slider.setValue(100)
+        self.mono_slider.setValue(0)
+        self.sharp_slider.setValue(0)
+        self.block_signals(False)
+        
+        self.rotation = 0
+        self.flip_h = False
+        self.flip_v = False
+        self.crop_box = None
+        self.current_filter_index = 0  # Reset to Neutral filter
+
+        # Show filter UI elements
+        self.filter_left_btn.show()
+        self.filter_right_btn.show()
+        self.filter_name_label.setText(self.filters[0][0])  # "Neutral"
+        self.filter_name_label.show()
+        
+        # Show undo/redo icon buttons
+        self.undo_icon_btn.show()
+        self.redo_icon_btn.show()
+        
+        self.position_filter_ui()
+
+        # Keep upload button visible so user can upload new photos anytime
+        # self.upload_btn.setVisible(False)  # Commented out - button stays visible
+        
+        self.update_display()
+
+    def start_full_load(self):
+        """Start the pending full-resolution decode now (it starts by itself after FULL_LOAD_DELAY_MS)"""
+        self.full_load_timer.stop()
+        if self.full_load_pending:
+            self.full_load_pending = False
+            self.load_pool.start(self.full_load_job)
+
+    def on_full_image_loaded(self, job):
+        if job is not self.full_load_job:
+            return  # Another photo was opened meanwhile
+        self.full_load_job = None
+        self.original_image = job.wait()
+        self.draft_image = None
+        if self.zoom:
+            # Same magnification of the photo, in pixels of the new level 0
+            self.zoom *= max(self.pyramid[0].size) / max(job.pyramid[0].size)
+        self.pyramid = job.pyramid
+        self.tile_cache.clear()  # Tile levels refer to the old pyramid
+        self.tile_scheduler.clear()
+        self.statusBar().showMessage(f"Full resolution decoded in {job.seconds * 1000:.0f} ms", 5000)
+        if self.proxy_needs_rebuild():
+            self.build_proxy()
+            self.apply_filters()
+
+    def on_full_image_failed(self, job, message):
+        if job is self.full_load_job:
+            QMessageBox.warning(self, "Error", f"Failed to load image: {message}")
+
+    # --- FOLDER BROWSING ---
+    def open_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Open Folder")
+        if not folder:
+            return
+        files = list_images(folder)
+        if not files:
+            QMessageBox.warning(self, "Warning", "No photos in this folder!")
+            return
+        self.folder_files = files
+        self.show_folder_photo(0)
+
+    def show_folder_photo(self, index):
+        if not 0 <= index < len(self.folder_files):
+            return
+        path = self.folder_files[index]
+        self.folder_index = index
+        try:
+            self.load_photo(path)
+        except Exception as e:
+            QMessageBox.warning(self, "Error", f"Failed to load image: {str(e)}")
+        else:
+            name = os.path.basename(path)
+            self.statusBar().showMessage(f"{name} ({index + 1}/{len(self.folder_files)}) - {self.statusBar().currentMessage()}")
+        self.prefetch_neighbours()
+
+    def swipe_next(self):
+        # Swipes step through the folder if one is open, else through the filters
+        if self.folder_files:
+            self.show_folder_photo(self.folder_index + 1)
+        else:
+            self.next_filter()
+
+    def swipe_prev(self):
+        if self.folder_files:
+            self.show_folder_photo(self.folder_index - 1)
+        else:
+            self.prev_filter()
+
+    def prefetch_window(self):
+        first = max(0, self.folder_index - settings.FOLDER_PREFETCH)
+        return self.folder_files[first:self.folder_index + settings.FOLDER_PREFETCH + 1]
+
+    def prefetch_neighbours(self):
+        """Decode the photos around the current one in the background, nearest first"""
+        max_side = self.proxy_max_side()
+        for distance in range(1, settings.FOLDER_PREFETCH + 1):
+            for index in (self.folder_index + distance, self.folder_index - distance):
+                if not 0 <= index < len(self.folder_files):
+                    continue
+                path = self.folder_files[index]
+                if path in self.prefetching or self.decode_cache.get(path, max_side):
+                    continue
+                job = PrefetchJob(path, max_side)
+                job.is_wanted = lambda path=path: path in self.prefetch_window()
+                job.signals.decoded.connect(self.on_prefetched)
+                job.signals.done.connect(self.on_prefetch_done)
+                self.prefetching.add(path)
+                self.prefetch_pool.start(job)
+
+    def on_prefetched(self, job):
+        if job.path in self.prefetch_window():
+            self.decode_cache.put(job.path, job.max_side, job.decoded, job.pyramid, job.proxy)
+
+    def on_prefetch_done(self, job):
+        self.prefetching.discard(job.path)
+
+    def show_album_browser(self):
+        browser = AlbumBrowser(settings.ALBUM_PATH, settings.THUMBNAIL_CACHE_PATH, self)
+        browser.item_opened.connect(self.open_album_item)
+        browser.exec_()
+        browser.deleteLater()  # Frees its thumbnails and thread pools
+
+    def open_album_item(self, item):
+        self.folder_files = []
+        if item.entry:
+            self.open_album_entry(item.entry)
+        else:
+            self.load_photo(item.path)
+
+    def open_album_entry(self, file):
+        try:
+            entry = load_entry(file)
+            source_path = entry["source"]["path"]
+            if not os.path.exists(source_path):
+                # Original moved or deleted: the recipe can't be re-applied,
+                # show the saved render instead (saving makes a new item)
+                self.load_photo(entry_render_path(file, entry))
+                QMessageBox.warning(self, "Warning", f"Original photo not found:\n{source_path}\n\n"
+                                    "Showing the saved render instead, edits are saved as a new album item.")
+                return
+            self.load_photo(source_path)
+            self.album_entry = file
+            # Edits come back from the recipe, not from the saved JPEG
+            self.restore_state(entry["recipe"])
+            self.update_album_render(file, entry)
+        except Exception as e:
+            QMessageBox.warning(self, "Error", f"Failed to open album item: {str(e)}")
+
+    def update_album_render(self, file, entry):
+        """Re-render an album item in the background if its original changed since it was saved"""
+        if not is_render_stale(file, entry):
+            return
+        job = ExportJob("Updating album render")
+        filters = list(self.filters)
+
+        def render(image, recipe):
+            return render_full_resolution(
+                image, recipe, filters,
+                tiled_min_pixels=settings.TILED_RENDER_MIN_PIXELS,
+                memory_budget=settings.TILE_MEMORY_BUDGET,
+                workers=settings.render_workers(),
+                should_cancel=job.is_cancelled,
+                progress=lambda f: job.report(0.9 * f)
+            )
+
+        def task(job):
+            ensure_render(file, render)
+            return "Album render updated"
+        self.start_export(job, task)
+
     def block_signals(self, block):
         self.bright_slider.blockSignals(block)
         self.contrast_slider.blockSignals(block)
@@ -741,17 +1106,141 @@ class MemoryLensGUI(QMainWindow):
 
     def update_display(self, pixmap=None):
         target = pixmap if pixmap else self.current_pixmap
+        if target and self.zoom and self.show_viewport(target):
+            return
         if target:
             # Scale to available label size
-            scaled_pixmap = target.scaled(self.image_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            scaled_pixmap = self.display_cache.scaled(target, self.image_label.size())
             self.image_label.setPixmap(scaled_pixmap)
             
-    # Removed duplicate pil_to_pixmap
+    # --- ZOOM & PAN ---
+    def frame_size(self):
+        """Size of the edited frame (after geometry and crop) at full resolution"""
+        layout = FrameLayout(self.pyramid[0], self.get_current_state())
+        return max(1, layout.width), max(1, layout.height)
+
+    def fit_zoom(self):
+        w, h = self.frame_size()
+        return min(self.image_label.width() / w, self.image_label.height() / h)
+
+    def reset_zoom(self):
+        self.zoom = None
+        self.view_center = (0.5, 0.5)
+        self.image_label.zoomed = False
+
+    def zoom_to_fit(self):
+        if self.zoom:
+            self.reset_zoom()
+            self.update_display()
+
+    def zoom_by(self, factor, pos):
+        if self.proxy_image:
+            self.set_zoom((self.zoom or self.fit_zoom()) * factor, pos)
+
+    def set_zoom(self, zoom, anchor=None):
+        if not self.proxy_image or self.image_label.crop_mode:
+            return
+        fit = self.fit_zoom()
+        zoom = min(max(zoom, fit), settings.MAX_ZOOM)
+        if zoom <= fit * 1.001:
+            self.zoom_to_fit()
+            return
+        if anchor is not None:
+            # Keep the photo point under the cursor in place
+            w, h = self.frame_size()
+            current = self.zoom or fit
+            dx = anchor.x() - self.image_label.width() / 2
+            dy = anchor.y() - self.image_label.height() / 2
+            cx = self.view_center[0] + dx / (current * w) - dx / (zoom * w)
+            cy = self.view_center[1] + dy / (current * h) - dy / (zoom * h)
+            self.view_center = (cx, cy)
+        self.zoom = zoom
+        self.image_label.zoomed = True
+        self.start_full_load()  # Tiles come from its pyramid once it is decoded
+        self.statusBar().showMessage(f"Zoom {self.zoom * 100:.0f}%", 2000)
+        self.update_display()
+
+    def pan_view(self, delta):
+        if not self.zoom:
+            return
+        w, h = self.frame_size()
+        cx, cy = self.view_center
+        self.view_center = (cx - delta.x() / (self.zoom * w), cy - delta.y() / (self.zoom * h))
+        self.update_display()
+
+    def clamp_view(self, w, h):
+        # Keep the view inside the frame, centre it on sides it is wider than
+        center = []
+        for value, side, panel in zip(self.view_center, (w, h), (self.image_label.width(), self.image_label.height())):
+            half = panel / (2 * self.zoom * side)
+            center.append(min(max(value, half), 1 - half) if half < 0.5 else 0.5)
+        self.view_center = tuple(center)
+
+    def show_viewport(self, preview):
+        """Draw the zoomed-in view: cached tiles, the preview upscaled where tiles are missing
+
+        Missing tiles are requested from the tile scheduler. Returns False
+        when the view can't zoom (the fitted view is shown instead).
+        """
+        if self.zoom <= self.fit_zoom():
+            self.reset_zoom()  # The panel grew past the zoom
+            return False
+        state = self.get_current_state()
+        if any(stage.kind == 'frame' for stage in build_stages(state, self.filters)):
+            return False
+
+        full_w, full_h = self.frame_size()
+        index = level_index(self.pyramid, self.zoom * max(self.pyramid[0].size))
+        level = self.pyramid[index]
+        layout = FrameLayout(level, state)
+        if not layout.width or not layout.height:
+            return False
+        self.clamp_view(full_w, full_h)
+        scale = self.zoom * full_w / layout.width  # Screen pixels per level pixel
+
+        label_w, label_h = self.image_label.width(), self.image_label.height()
+        cx, cy = self.view_center[0] * layout.width, self.view_center[1] * layout.height
+        view = (cx - label_w / (2 * scale), cy - label_h / (2 * scale),
+                cx + label_w / (2 * scale), cy + label_h / (2 * scale))
+
+        def on_screen(box):
+            return QRectF((box[0] - view[0]) * scale, (box[1] - view[1]) * scale,
+                          (box[2] - box[0]) * scale, (box[3] - box[1]) * scale)
+
+        canvas = QPixmap(self.image_label.size())
+        canvas.fill(Qt.white)
+        painter = QPainter(canvas)
+        painter.setRenderHint(QPainter.SmoothPixmapTransform, scale < 1)
+
+        visible = (max(0, view[0]), max(0, view[1]), min(layout.width, view[2]), min(layout.height, view[3]))
+        sx, sy = preview.width() / layout.width, preview.height() / layout.height
+        painter.drawPixmap(on_screen(visible), preview,
+                           QRectF(visible[0] * sx, visible[1] * sy,
+                                  (visible[2] - visible[0]) * sx, (visible[3] - visible[1]) * sy))
+
+        key = state_key(state)
+        missing = []
+        for tile_index, box in visible_tiles(view, layout.width, layout.height, settings.TILE_SIZE):
+            tile = self.tile_cache.get((key, index, tile_index))
+            if tile:
+                painter.drawPixmap(on_screen(box), tile, QRectF(tile.rect()))
+            else:
+                missing.append(((key, index, tile_index), box))
+        painter.end()
+        self.image_label.setPixmap(canvas)
+
+        if missing:
+            self.tile_scheduler.request(level, self.proxy_image, state, self.filters, missing, key)
+        return True
+
+    def on_tile_ready(self, key, qimage):
+        self.tile_cache.put(key, QPixmap.fromImage(qimage))
+        if self.zoom:
+            self.viewport_timer.start()
+
     def pil_to_pixmap(self, pil_image):
-        pil_image.save("temp.png")
-        pixmap = QPixmap("temp.png")
-        os.remove("temp.png")
-        return pixmap
+        # In-memory conversion, no temp file round-trip
+        return pil_to_pixmap(pil_image)
 
     def rotate_image(self, angle):
         self.save_undo_state()
@@ -768,7 +1257,7 @@ class MemoryLensGUI(QMainWindow):
     
     def next_filter(self):
         """Cycle to next filter (swipe left or right arrow)"""
-        if not self.original_image:
+        if not self.proxy_image:
             return
         
         self.save_undo_state()
@@ -781,7 +1270,7 @@ class MemoryLensGUI(QMainWindow):
     
     def prev_filter(self):
         """Cycle to previous filter (swipe right or left arrow)"""
-        if not self.original_image:
+        if not self.proxy_image:
             return
         
         self.save_undo_state()
@@ -793,78 +1282,157 @@ class MemoryLensGUI(QMainWindow):
         self.apply_filters()
 
 
-    def apply_filters(self):
-        if not self.original_image: 
+    def slider_dragging(self):
+        sliders = (self.bright_slider, self.contrast_slider, self.sat_slider, self.mono_slider, self.sharp_slider)
+        return any(slider.isSliderDown() for slider in sliders)
+
+    def apply_filters(self, refine=False):
+        """Show the current state: from the cache, or queue a render
+
+        While a slider is dragged a coarse frame is rendered and the refined
+        one is scheduled for when input stops (refine=True renders it).
+        """
+        if not self.proxy_image: 
             return
 
-        try:
-            # 1. Start from Original
-            img = self.original_image.copy()
-            
-            # --- Geometry Transforms (First) ---
-            if self.rotation != 0:
-                img = apply_rotate(img, self.rotation)
-            
-            if self.flip_h:
-                img = apply_flip(img, 'horizontal')
-                
-            if self.flip_v:
-                img = apply_flip(img, 'vertical')
-            
-            # --- CROP (Second) ---
-            if self.crop_box:
-                img = img.crop(self.crop_box)
-            
-            # --- FILTER (Third) ---
-            # Apply selected filter
-            filter_func = self.filters[self.current_filter_index][1]
-            img = filter_func(img)
-
-            # 2. Get all values
-            bright_factor = self.bright_slider.value() / 100.0
-            contrast_factor = self.contrast_slider.value() / 100.0
-            sat_factor = self.sat_slider.value() / 100.0
-            mono_factor = self.mono_slider.value() / 100.0
-            sharp_factor = self.sharp_slider.value() / 100.0
-
-            # 3. Apply Filters Sequentially
-            
-            # Brightness
-            if bright_factor != 1.0:
-                img = adjust_brightness(img, bright_factor)
-            
-            # Contrast
-            if contrast_factor != 1.0:
-                img = adjust_contrast(img, contrast_factor)
-                
-            # Saturation
-            if sat_factor != 1.0:
-                img = adjust_saturation(img, sat_factor)
+        timer = self.profiler.frame() if self.profiler else None
+        state = self.get_current_state()
+        cached = self.render_cache.get(state)
+        if timer:
+            timer.mark('cache_lookup')
+        if cached:
+            # Seen this state recently, drop older in-flight renders and reuse it
+            self.render_scheduler.cancel()
+            self.refine_timer.stop()
+            self.current_image, self.current_pixmap, histogram = cached
+            self.histogram_widget.set_histogram(histogram)
+            self.update_display()
+            if timer:
+                timer.label = 'cached frame'
+                timer.mark('display')
+                self.record_frame(timer)
+            return
 
-            # Monochrome
-            if mono_factor > 0:
-                img = apply_monochrome(img, mono_factor)
+        if not refine and self.slider_dragging():
+            # Quick feedback now, the refined frame once the slider rests
+            if timer:
+                timer.label = 'coarse frame'
+            self.render_scheduler.request(self.coarse_image, state, self.filters, timer, coarse=True)
+            self.refine_timer.start()
+            return
 
-            # Sharpen
-            if sharp_factor > 0:
-                img = apply_sharpen(img, sharp_factor)
+        # Interactive edits render on the preview proxy, off the GUI thread
+        self.refine_timer.stop()
+        self.render_scheduler.request(self.proxy_image, state, self.filters, timer)
+
+    def on_render_finished(self, img, qimage, histogram, state, timer, coarse):
+        if timer:
+            timer.mark('delivery')
+        # Update Result
+        self.current_image = img
+        self.current_pixmap = QPixmap.fromImage(qimage)
+        if timer:
+            timer.mark('to_pixmap')
+        if not coarse:
+            self.render_cache.put(state, self.current_image, self.current_pixmap, histogram)
+        self.histogram_widget.set_histogram(histogram)
+        self.update_display()
+        if timer:
+            timer.mark('display')
+            self.record_frame(timer)
+
+    # --- RENDER TIMING (debug) ---
+    def toggle_debug_overlay(self):
+        if self.profiler:
+            self.profiler = None
+            self.debug_overlay.hide()
+        else:
+            self.profiler = Profiler()
+            self.debug_overlay.setText("Render timing on, waiting for a frame...")
+            self.debug_overlay.adjustSize()
+            self.debug_overlay.show()
+
+    def record_frame(self, timer):
+        if not self.profiler:
+            return  # Turned off while the frame was rendering
+        self.profiler.record(timer)
+        self.debug_overlay.show_profile(self.profiler)
+
+    def export_render_trace(self):
+        if not self.profiler:
+            self.statusBar().showMessage("Press F12 to start recording render timings first", 5000)
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Export Render Trace", "memorylens_trace.json", "Trace JSON (*.json)")
+        if path:
+            count = self.profiler.export_trace(path)
+            self.statusBar().showMessage(f"Exported {count} trace events (open in chrome://tracing or Perfetto)", 5000)
 
-            # 4. Update Result
-            self.current_image = img
-            self.update_display(self.pil_to_pixmap(self.current_image))
-            
-        except Exception as e:
-            # Optional: print error to console, but don't spam popups during slide
-            print(f"Error applying filters: {e}")
+    def on_render_failed(self, message):
+        # Optional: print error to console, but don't spam popups during slide
+        print(f"Error applying filters: {message}")
 
     def save_to_album(self):
         if self.current_image:
-            album_path = "user_data/albums/"
-            try:
-                save_to_album(self.current_image, album_path)
-                QMessageBox.information(self, "Success", "Image saved to album!")
-            except Exception as e:
-                QMessageBox.warning(self, "Error", f"Failed to save image: {str(e)}")
+            album_path = settings.ALBUM_PATH
+            source_path = self.source_path
+            state = self.get_current_state()
+            entry = self.album_entry  # Album items opened for re-editing are updated in place
+            job = ExportJob("Saving to album")
+            render_full = self.full_render_task(job)
+
+            def task(job):
+                save_entry(render_full, source_path, state, album_path, entry)
+                return "Image saved to album!"
+            self.start_export(job, task)
+
+    # --- BACKGROUND EXPORTS ---
+    def start_export(self, job, task):
+        # Exports run one at a time on export_pool, later ones wait in its queue
+        job.task = task
+        job.signals.progress.connect(self.on_export_progress)
+        job.signals.finished.connect(self.on_export_finished)
+        job.signals.failed.connect(self.on_export_failed)
+        job.signals.cancelled.connect(self.on_export_cancelled)
+        self.export_jobs.append(job)
+        self.export_pool.start(job)
+        self.update_export_ui()
+
+    def update_export_ui(self):
+        if not self.export_jobs:
+            self.export_progress.hide()
+            self.export_cancel_btn.hide()
+            return
+        job = self.export_jobs[0]
+        queued = f" (+{len(self.export_jobs) - 1} queued)" if len(self.export_jobs) > 1 else ""
+        self.export_progress.setFormat(f"{job.description}{queued}: %p%")
+        self.export_progress.show()
+        self.export_cancel_btn.show()
+
+    def cancel_exports(self):
+        for job in self.export_jobs:
+            job.cancel()
+
+    def on_export_progress(self, job, percent):
+        if self.export_jobs and job is self.export_jobs[0]:
+            self.export_progress.setValue(percent)
+
+    def end_export(self, job):
+        if job in self.export_jobs:
+            self.export_jobs.remove(job)
+        self.export_progress.setValue(0)
+        self.update_export_ui()
+
+    def on_export_finished(self, job, message):
+        self.end_export(job)
+        self.statusBar().showMessage(message, 5000)
+
+    def on_export_failed(self, job, message):
+        self.end_export(job)
+        QMessageBox.warning(self, "Error", f"{job.description} failed: {message}")
+
+    def on_export_cancelled(self, job):
+        self.end_export(job)
+        self.statusBar().showMessage(f"{job.description} cancelled", 5000)
 
     def export_image(self):
         if not self.current_image:
@@ -892,8 +1460,21 @@ class MemoryLensGUI(QMainWindow):
         quality_slider.setValue(95)
         quality_slider.valueChanged.connect(lambda v: quality_label.setText(f"Quality: {v}%"))
         
+        # Target file size: the highest quality up to the slider's that fits
+        size_layout = QHBoxLayout()
+        size_check = QCheckBox("Limit file size to")
+        size_spin = QSpinBox()
+        size_spin.setRange(10, 100000)
+        size_spin.setValue(500)
+        size_spin.setSuffix(" KB")
+        size_spin.setEnabled(False)
+        size_check.toggled.connect(size_spin.setEnabled)
+        size_layout.addWidget(size_check)
+        size_layout.addWidget(size_spin)
+
         quality_layout.addWidget(quality_label)
         quality_layout.addWidget(quality_slider)
+        quality_layout.addLayout(size_layout)
         quality_group.setLayout(quality_layout)
         layout.addWidget(quality_group)
 
@@ -911,19 +1492,28 @@ class MemoryLensGUI(QMainWindow):
         if dialog.exec_() == QDialog.Accepted:
             selected_format = format_combo.currentText()
             selected_quality = quality_slider.value()
+            max_bytes = size_spin.value() * 1000 if size_check.isChecked() and selected_format == "JPEG" else None
             
             ext_filter = f"{selected_format} Files (*.{selected_format.lower()})"
             file_path, _ = QFileDialog.getSaveFileName(self, "Export Image", "", ext_filter)
             
             if file_path:
-                try:
-                    if selected_format == "JPEG":
-                        self.current_image.convert("RGB").save(file_path, format=selected_format, quality=selected_quality, optimize=True)
-                    else:
-                        self.current_image.save(file_path, format=selected_format)
-                    QMessageBox.information(self, "Success", f"Image exported to {file_path}")
-                except Exception as e:
-                    QMessageBox.warning(self, "Error", f"Failed to export image: {str(e)}")
+                job = ExportJob("Exporting")
+                render_full = self.full_render_task(job)
+
+                def task(job):
+                    full_image = render_full()
+                    job.check_cancelled()
+                    if max_bytes:
+                        data, quality, attempts = compress_to_size(full_image, max_bytes, max_quality=selected_quality,
+                                                                   workers=settings.render_workers())
+                        write_bytes(data, file_path)
+                        job.report(1.0)
+                        return f"Image exported to {file_path} (quality {quality}, {len(data) // 1000} KB, {attempts} trial encodes)"
+                    write_image(full_image, file_path, selected_format, selected_quality)
+                    job.report(1.0)
+                    return f"Image exported to {file_path}"
+                self.start_export(job, task)
 
 class MainPage(QWidget):
     def __init__(self):
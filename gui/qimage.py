@@ -0,0 +1,45 @@
+from PyQt5.QtGui import QImage, QPixmap
+
+from processing.buffers import FRAME_MODES, copy_into
+
+# PIL mode -> (QImage format, bytes per pixel)
+QIMAGE_FORMATS = {
+    "RGB": (QImage.Format_RGB888, 3),
+    "RGBA": (QImage.Format_RGBA8888, 4),
+    "L": (QImage.Format_Grayscale8, 1),
+    "RGBX": (QImage.Format_RGBX8888, 4),
+}
+
+def _wrap_buffer(buffer, width, height, mode):
+    """Wrap a raw pixel buffer as a QImage without copying it"""
+    qformat, bpp = QIMAGE_FORMATS[mode]
+    qimage = QImage(buffer, width, height, width * bpp, qformat)
+    # QImage only references the buffer, keep it alive as long as the image
+    qimage._buffer = buffer
+    return qimage
+
+def qimage_mode(image):
+    """Mode pil_to_qimage() hands to Qt (RGB, RGBA and L are passed through)"""
+    if image.mode in FRAME_MODES:
+        return image.mode
+    has_alpha = "A" in image.getbands() or "transparency" in image.info
+    return "RGBA" if has_alpha else "RGB"
+
+def pil_to_qimage(image, out=None):
+    """Convert a PIL image to a QImage in memory
+
+    out: optional uint8 array of processing.buffers.frame_shape(qimage_mode(image),
+    image.size) that receives the pixels instead of a new buffer. The
+    QImage uses it directly, keep it unchanged while the QImage is used.
+    """
+    mode = qimage_mode(image)
+    if mode != image.mode:
+        image = image.convert(mode)
+    w, h = image.size
+    if out is not None:
+        copy_into(image, out)
+        return _wrap_buffer(out.data, w, h, FRAME_MODES[mode])
+    return _wrap_buffer(image.tobytes(), w, h, mode)
+
+def pil_to_pixmap(image):
+    return QPixmap.fromImage(pil_to_qimage(image))
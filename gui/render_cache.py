@@ -0,0 +1,161 @@
+from collections import OrderedDict
+import hashlib
+import json
+
+from PyQt5.QtCore import Qt
+
+
+def state_key(state):
+    """Stable hash of an edit state dict"""
+    data = json.dumps(state, sort_keys=True)
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+
+def _pixmap_cost(pixmap):
+    return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+
+
+def _entry_cost(image, pixmap):
+    # Pillow and QPixmap both keep 4 bytes per pixel for colour images
+    return image.width * image.height * 4 + _pixmap_cost(pixmap)
+
+
+class RenderCache:
+    """LRU cache of rendered previews (PIL image, QPixmap, histogram) keyed by edit state
+
+    Entries are evicted least recently used first once their total size
+    goes over budget bytes. Only valid for one proxy image, clear() it
+    when the proxy changes.
+    """
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.entries = OrderedDict()  # key -> (image, pixmap, histogram, cost)
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, state):
+        key = state_key(state)
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry[:3]
+
+    def put(self, state, image, pixmap, histogram=None):
+        key = state_key(state)
+        cost = _entry_cost(image, pixmap)
+        if cost > self.budget:
+            return
+        if key in self.entries:
+            self.size -= self.entries.pop(key)[3]
+        self.entries[key] = (image, pixmap, histogram, cost)
+        self.size += cost
+        while self.size > self.budget:
+            _, (_, _, _, old_cost) = self.entries.popitem(last=False)
+            self.size -= old_cost
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+
+
+class ScaledPixmapCache:
+    """Smooth-scaled copies of pixmaps for display, keyed by pixmap and target size
+
+    Resizing back to a recent window size, or redrawing the same frame,
+    reuses the scaled copy instead of smooth-scaling again. Keeps the
+    max_entries most recently used copies.
+    """
+
+    def __init__(self, max_entries=8):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # (pixmap cacheKey, width, height) -> QPixmap
+
+    def scaled(self, pixmap, size):
+        key = (pixmap.cacheKey(), size.width(), size.height())
+        scaled = self.entries.get(key)
+        if scaled is None:
+            scaled = pixmap.scaled(size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            self.entries[key] = scaled
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        else:
+            self.entries.move_to_end(key)
+        return scaled
+
+    def clear(self):
+        self.entries.clear()
+
+
+class TileCache:
+    """LRU cache of zoomed-in view tiles (QPixmaps), keyed by (state key, level, tile index)
+
+    Panning back over rendered tiles reuses them. Evicts least recently
+    used tiles once their total size goes over budget bytes.
+    """
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.entries = OrderedDict()  # key -> pixmap
+        self.size = 0
+
+    def get(self, key):
+        pixmap = self.entries.get(key)
+        if pixmap is not None:
+            self.entries.move_to_end(key)
+        return pixmap
+
+    def put(self, key, pixmap):
+        if key in self.entries:
+            self.size -= _pixmap_cost(self.entries.pop(key))
+        self.entries[key] = pixmap
+        self.size += _pixmap_cost(pixmap)
+        while self.size > self.budget and len(self.entries) > 1:
+            _, old = self.entries.popitem(last=False)
+            self.size -= _pixmap_cost(old)
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+
+
+class DecodeCache:
+    """LRU cache of decoded photos and their preview proxies, keyed by path
+
+    Values are (decoded, pyramid, proxy): the open_draft() result, its
+    mipmap levels and the proxy made from them for a panel of max_side.
+    A different max_side is a miss. Entries are evicted least recently
+    used first once their total size goes over budget bytes.
+    """
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.entries = OrderedDict()  # path -> (value, max_side, cost)
+        self.size = 0
+
+    def get(self, path, max_side):
+        entry = self.entries.get(path)
+        if entry is None or entry[1] != max_side:
+            return None
+        self.entries.move_to_end(path)
+        return entry[0]
+
+    def put(self, path, max_side, decoded, pyramid, proxy):
+        cost = sum(level.width * level.height * 4 for level in pyramid + [proxy])
+        if cost > self.budget:
+            return
+        if path in self.entries:
+            self.size -= self.entries.pop(path)[2]
+        self.entries[path] = ((decoded, pyramid, proxy), max_side, cost)
+        self.size += cost
+        while self.size > self.budget:
+            _, (_, _, old_cost) = self.entries.popitem(last=False)
+            self.size -= old_cost
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
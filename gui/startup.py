@@ -0,0 +1,67 @@
+from PyQt5.QtCore import QObject, QEvent, QTimer, pyqtSignal
+import importlib
+import os
+import threading
+import time
+
+
+class FirstPaintTimer(QObject):
+    """Reports the time from start (a time.perf_counter() value) to widget's first paint"""
+    painted = pyqtSignal(float)  # seconds
+
+    def __init__(self, start, widget):
+        super().__init__(widget)
+        self.start = start
+        self.widget = widget
+        widget.installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if obj is self.widget and event.type() == QEvent.Paint:
+            self.widget.removeEventFilter(self)
+            # Measured once the paint event has been handled
+            QTimer.singleShot(0, lambda: self.painted.emit(time.perf_counter() - self.start))
+        return False
+
+
+class EditorLoader(QObject):
+    """Imports the editor in a background thread, then builds its page on the GUI thread
+
+    begin() starts the import (call it once the login page is painted).
+    page() returns the editor page, building it right away if the
+    background import hasn't got there yet (the import lock makes it wait
+    for a half-done import).
+    """
+    imported = pyqtSignal()
+    ready = pyqtSignal(object, float)  # page, seconds since start
+
+    def __init__(self, start, parent=None):
+        super().__init__(parent)
+        self.start = start
+        self.editor_page = None
+        self.imported.connect(self.page)
+
+    def begin(self):
+        threading.Thread(target=self._import, daemon=True).start()
+
+    def _import(self):
+        importlib.import_module("gui.interface")
+        self.imported.emit()  # Queued to the GUI thread
+
+    def page(self):
+        if self.editor_page is None:
+            from gui.interface import MainPage
+            self.editor_page = MainPage()
+            self.ready.emit(self.editor_page, time.perf_counter() - self.start)
+        return self.editor_page
+
+
+def log_startup(path, first_paint, editor_ready):
+    """Append one start-up's timings (ms) to the CSV at path"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    new_file = not os.path.exists(path)
+    with open(path, "a") as f:
+        if new_file:
+            f.write("time,first_paint_ms,editor_ready_ms\n")
+        f.write(f"{time.strftime('%Y-%m-%dT%H:%M:%S')},{first_paint * 1000:.1f},{editor_ready * 1000:.1f}\n")
@@ -0,0 +1,453 @@
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QBuffer, QByteArray, QIODevice, pyqtSignal
+from PyQt5.QtGui import QImage
+import threading
+
+from processing.pipeline import RenderCancelled, build_stages, make_proxy
+from processing.tiling import FrameLayout, frame_means, render_parallel, render_tiles
+from processing.histogram import frame_histogram
+from processing.pyramid import build_pyramid, nearest_level
+from processing.buffers import BufferPool, frame_shape
+from gui.qimage import pil_to_qimage, qimage_mode
+from storage.load_image import load_full, make_thumbnail, open_draft
+from storage.album import scan_album
+
+
+class RenderSignals(QObject):
+    finished = pyqtSignal(int, object, object, object)  # job id, PIL image, QImage, histogram
+    failed = pyqtSignal(int, str)
+    done = pyqtSignal(int)  # Always emitted last (finished, failed or cancelled)
+
+
+class RenderJob(QRunnable):
+    """Runs the edit pipeline off the GUI thread"""
+
+    def __init__(self, job_id, image, state, filters, is_stale, timer=None, buffers=None,
+                 workers=1, min_parallel_pixels=0, histogram_pixels=None, coarse=False):
+        super().__init__()
+        self.job_id = job_id
+        self.image = image
+        self.state = state
+        self.filters = filters
+        self.is_stale = is_stale
+        self.timer = timer
+        self.coarse = coarse  # Quick low-resolution frame, a refined one follows
+        self.buffers = buffers  # BufferPool for the QImage pixels
+        self.buffer = None
+        self.workers = workers
+        self.min_parallel_pixels = min_parallel_pixels
+        self.histogram_pixels = histogram_pixels  # None = no histogram
+        self.signals = RenderSignals()
+
+    def run(self):
+        try:
+            if self.is_stale():
+                return
+            if self.timer:
+                self.timer.mark('queued')
+            img = render_parallel(self.image, self.state, self.filters, self.workers,
+                                  self.min_parallel_pixels, should_cancel=self.is_stale,
+                                  timer=self.timer)
+            # QImage is safe to build off the GUI thread (QPixmap is not)
+            if self.buffers is not None:
+                self.buffer = self.buffers.take(frame_shape(qimage_mode(img), img.size))
+            qimage = pil_to_qimage(img, out=self.buffer)
+            if self.timer:
+                self.timer.mark('to_qimage')
+            histogram = None
+            if self.histogram_pixels is not None:
+                # From the preview just rendered, subsampled, off the GUI thread
+                histogram = frame_histogram(img, self.histogram_pixels)
+                if self.timer:
+                    self.timer.mark('histogram')
+            self.signals.finished.emit(self.job_id, img, qimage, histogram)
+        except RenderCancelled:
+            pass
+        except Exception as e:
+            self.signals.failed.emit(self.job_id, str(e))
+        finally:
+            self.signals.done.emit(self.job_id)
+
+
+class RenderScheduler(QObject):
+    """Latest-wins render queue
+
+    At most one job runs at a time. Requests made while it runs replace
+    each other, so only the newest state is rendered next and intermediate
+    slider values are never rendered. The running job is kept (it is still
+    newer than what is on screen) unless cancel() is called, which aborts
+    it at the next stage boundary and drops its result. A coarse request
+    also cancels a full-resolution render in flight: new input made it
+    stale and the coarse frame should not wait behind it.
+
+    The QImage of `rendered` lives in a pooled buffer that is reused once
+    the signal returns: convert it (QPixmap.fromImage) inside the slot.
+    """
+    rendered = pyqtSignal(object, object, object, object, object, bool)  # PIL image, QImage, histogram, state, FrameTimer or None, coarse
+    failed = pyqtSignal(str)
+
+    def __init__(self, parent=None, workers=1, min_parallel_pixels=0, histogram_pixels=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        # Each render is split into bands over this many threads
+        self.workers = workers
+        self.min_parallel_pixels = min_parallel_pixels
+        # Each frame comes with its histogram, sampled from at most this many pixels
+        self.histogram_pixels = histogram_pixels
+        self.next_id = 0
+        self.generation = 0  # Bumped by cancel(), older jobs are stale
+        self.running = None
+        self.pending = None
+        self.buffers = BufferPool()
+
+    def request(self, image, state, filters, timer=None, coarse=False):
+        if coarse and self.running is not None and not self.running.coarse:
+            self.cancel()
+        self.next_id += 1
+        self.pending = RenderJob(self.next_id, image, state, filters,
+                                 self._stale_check(self.generation), timer, self.buffers,
+                                 self.workers, self.min_parallel_pixels, self.histogram_pixels, coarse)
+        if self.running is None:
+            self._start_pending()
+
+    def cancel(self):
+        self.generation += 1
+        self.pending = None
+
+    def _stale_check(self, generation):
+        return lambda: generation != self.generation
+
+    def _start_pending(self):
+        job, self.pending = self.pending, None
+        if job is None:
+            return
+        job.signals.finished.connect(self._on_finished)
+        job.signals.failed.connect(self._on_failed)
+        job.signals.done.connect(self._on_done)
+        self.running = job
+        self.pool.start(job)
+
+    def _on_finished(self, job_id, image, qimage, histogram):
+        if not self.running.is_stale():
+            job = self.running
+            self.rendered.emit(image, qimage, histogram, job.state, job.timer, job.coarse)
+
+    def _on_failed(self, job_id, message):
+        if not self.running.is_stale():
+            self.failed.emit(message)
+
+    def _on_done(self, job_id):
+        if self.running.buffer is not None:
+            self.buffers.give(self.running.buffer)
+        self.running = None
+        self._start_pending()
+
+
+class TileSignals(QObject):
+    tile_ready = pyqtSignal(object, object)  # tile key, QImage
+    failed = pyqtSignal(str)
+    done = pyqtSignal(int)
+
+
+class TileJob(QRunnable):
+    """Renders the tiles of a zoomed-in view off the GUI thread
+
+    tiles is [(key, box)], boxes in the frame of `level` (a mipmap level).
+    Contrast means come from the preview proxy, so tiles match the fitted
+    view; they are computed once per state and kept in the shared `means`
+    dict under means_key.
+    """
+
+    def __init__(self, job_id, level, preview, state, filters, tiles, means, means_key, is_stale, workers=1):
+        super().__init__()
+        self.job_id = job_id
+        self.level = level
+        self.preview = preview
+        self.state = state
+        self.filters = filters
+        self.tiles = tiles
+        self.means = means
+        self.means_key = means_key
+        self.is_stale = is_stale
+        self.workers = workers
+        self.signals = TileSignals()
+
+    def run(self):
+        try:
+            if self.is_stale():
+                return
+            stages = build_stages(self.state, self.filters)
+            means = self.means.get(self.means_key)
+            if means is None:
+                means = frame_means(self.preview, self.state, stages)
+                self.means[self.means_key] = means
+            layout = FrameLayout(self.level, self.state)
+            for key, tile in render_tiles(layout, stages, means, self.tiles, self.workers, self.is_stale):
+                self.signals.tile_ready.emit(key, pil_to_qimage(tile))
+        except RenderCancelled:
+            pass
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        finally:
+            self.signals.done.emit(self.job_id)
+
+
+class TileScheduler(QObject):
+    """Renders the visible tiles of the zoomed-in view, newest viewport first
+
+    Each request replaces the previous one: a running job stops at its next
+    tile. Tiles that were already rendered are still delivered, they are
+    valid for their key whatever the view shows now.
+    """
+    tile_ready = pyqtSignal(object, object)  # tile key, QImage
+    failed = pyqtSignal(str)
+
+    def __init__(self, parent=None, workers=1):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.workers = workers
+        self.next_id = 0
+        self.generation = 0
+        self.running = None
+        self.pending = None
+        self.means = {}  # state key -> contrast means, shared with the jobs
+        self.requested = set()  # Tile keys of the newest job
+
+    def request(self, level, preview, state, filters, tiles, means_key):
+        keys = {key for key, _ in tiles}
+        if keys <= self.requested:
+            return  # Already on their way
+        self.cancel()
+        self.requested = keys
+        if len(self.means) > 8:
+            self.means.clear()
+        self.next_id += 1
+        self.pending = TileJob(self.next_id, level, preview, state, filters, tiles, self.means,
+                               means_key, self._stale_check(self.generation), self.workers)
+        if self.running is None:
+            self._start_pending()
+
+    def cancel(self):
+        self.generation += 1
+        self.pending = None
+        self.requested = set()
+
+    def clear(self):
+        """Cancel and forget the means, call when the preview proxy changes"""
+        self.cancel()
+        self.means.clear()
+
+    def _stale_check(self, generation):
+        return lambda: generation != self.generation
+
+    def _start_pending(self):
+        job, self.pending = self.pending, None
+        if job is None:
+            return
+        job.signals.tile_ready.connect(self.tile_ready)
+        job.signals.failed.connect(self.failed)
+        job.signals.done.connect(self._on_done)
+        self.running = job
+        self.pool.start(job)
+
+    def _on_done(self, job_id):
+        self.running = None
+        if self.pending is None:
+            self.requested = set()  # The newest job is done
+        self._start_pending()
+
+
+class LoadSignals(QObject):
+    loaded = pyqtSignal(object)  # ImageLoadJob
+    failed = pyqtSignal(object, str)
+
+
+class ImageLoadJob(QRunnable):
+    """Decodes the full-resolution image in the background
+
+    The result is delivered through signals, or wait() can be used to
+    block until it is ready (e.g. when exporting right after loading).
+    Its mipmap pyramid is built here too, before `loaded` is emitted.
+    is_wanted() is checked first: a photo that is no longer open is not
+    decoded, and no signal is emitted.
+    """
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.image = None
+        self.pyramid = None
+        self.seconds = 0.0
+        self.error = None
+        self.is_wanted = lambda: True
+        self.finished = threading.Event()
+        self.signals = LoadSignals()
+
+    def run(self):
+        if not self.is_wanted():
+            self.error = "Skipped, another photo was opened"
+            self.finished.set()
+            return
+        try:
+            self.image, self.seconds = load_full(self.path)
+            self.finished.set()
+            self.pyramid = build_pyramid(self.image)
+            self.signals.loaded.emit(self)
+        except Exception as e:
+            self.error = str(e)
+            self.finished.set()
+            self.signals.failed.emit(self, self.error)
+
+    def wait(self):
+        self.finished.wait()
+        if self.error:
+            raise IOError(self.error)
+        return self.image
+
+
+class PrefetchSignals(QObject):
+    decoded = pyqtSignal(object)  # PrefetchJob
+    done = pyqtSignal(object)  # Always emitted last
+
+
+class PrefetchJob(QRunnable):
+    """Decodes a photo next to the current one in a folder, ahead of a swipe
+
+    Does what MemoryLensGUI.load_photo would: the reduced decode
+    (open_draft), its mipmap pyramid and the preview proxy for max_side.
+    is_wanted() is checked first, so photos the user has swiped away from
+    are skipped.
+    """
+
+    def __init__(self, path, max_side):
+        super().__init__()
+        self.path = path
+        self.max_side = max_side
+        self.decoded = None  # (image, scale, seconds)
+        self.pyramid = None
+        self.proxy = None
+        self.is_wanted = lambda: True
+        self.signals = PrefetchSignals()
+
+    def run(self):
+        try:
+            if self.is_wanted():
+                self.decoded = open_draft(self.path, self.max_side)
+                self.pyramid = build_pyramid(self.decoded[0])
+                self.proxy = make_proxy(nearest_level(self.pyramid, self.max_side), self.max_side)
+                self.signals.decoded.emit(self)
+        except Exception:
+            pass  # Reported when the photo is opened
+        finally:
+            self.signals.done.emit(self)
+
+
+class ExportSignals(QObject):
+    progress = pyqtSignal(object, int)  # job, percent
+    finished = pyqtSignal(object, str)  # job, message
+    failed = pyqtSignal(object, str)
+    cancelled = pyqtSignal(object)
+
+
+class ExportJob(QRunnable):
+    """Runs a full-resolution render + encode task off the GUI thread
+
+    task(job) does the work and returns a message for the user. It reports
+    progress with job.report(fraction) and passes job.is_cancelled as
+    should_cancel to the renderer; cancel() stops it at the next check.
+    """
+
+    def __init__(self, description, task=None):
+        super().__init__()
+        self.description = description
+        self.task = task
+        self.cancel_requested = False
+        self.signals = ExportSignals()
+
+    def cancel(self):
+        self.cancel_requested = True
+
+    def is_cancelled(self):
+        return self.cancel_requested
+
+    def check_cancelled(self):
+        if self.cancel_requested:
+            raise RenderCancelled()
+
+    def report(self, fraction):
+        self.signals.progress.emit(self, int(fraction * 100))
+
+    def run(self):
+        try:
+            self.check_cancelled()
+            message = self.task(self)
+            self.signals.finished.emit(self, message)
+        except RenderCancelled:
+            self.signals.cancelled.emit(self)
+        except Exception as e:
+            self.signals.failed.emit(self, str(e))
+
+
+class ThumbnailSignals(QObject):
+    ready = pyqtSignal(object, object, object)  # AlbumItem, QImage, new JPEG bytes or None
+    failed = pyqtSignal(object)
+    skipped = pyqtSignal(object)
+
+
+class ThumbnailJob(QRunnable):
+    """Decodes one album thumbnail off the GUI thread
+
+    With cached JPEG bytes it only decodes those. Otherwise it makes a new
+    thumbnail from the file (draft decoding) and also returns its JPEG
+    bytes for the cache. is_wanted() is checked before any work, so jobs
+    for items scrolled out of view are dropped cheaply.
+    """
+
+    def __init__(self, item, max_side, cached=None):
+        super().__init__()
+        self.item = item
+        self.max_side = max_side
+        self.cached = cached
+        self.is_wanted = lambda: True
+        self.signals = ThumbnailSignals()
+
+    def run(self):
+        if not self.is_wanted():
+            self.signals.skipped.emit(self.item)
+            return
+        try:
+            if self.cached is not None:
+                qimage = QImage.fromData(self.cached, "JPEG")
+                if not qimage.isNull():
+                    self.signals.ready.emit(self.item, qimage, None)
+                    return
+            thumb = make_thumbnail(self.item.thumb_source, self.max_side)
+            qimage = pil_to_qimage(thumb).copy()  # Own the pixels, thumb is dropped
+            data = QByteArray()
+            buffer = QBuffer(data)
+            buffer.open(QIODevice.WriteOnly)
+            qimage.save(buffer, "JPEG", 85)
+            self.signals.ready.emit(self.item, qimage, bytes(data))
+        except Exception:
+            self.signals.failed.emit(self.item)
+
+
+class ScanSignals(QObject):
+    finished = pyqtSignal(list)
+
+
+class AlbumScanJob(QRunnable):
+    """Lists the album folder (stat only) off the GUI thread"""
+
+    def __init__(self, album_path):
+        super().__init__()
+        self.album_path = album_path
+        self.signals = ScanSignals()
+
+    def run(self):
+        try:
+            items = scan_album(self.album_path)
+        except OSError:
+            items = []
+        self.signals.finished.emit(items)
@@ -1,22 +1,49 @@
+import time
+START = time.perf_counter()  # Start-up is timed from here to the first paint
+
 import sys
 from PyQt5.QtWidgets import QApplication, QStackedWidget
 from gui.login import LoginPage
-from gui.interface import MainPage
+from gui.startup import FirstPaintTimer, EditorLoader, log_startup
+import settings
+
+# The editor (gui.interface, with PIL, NumPy and the processing modules) is
+# imported in the background once the login page is on screen, and built
+# when that import is done or at login, whichever comes first.
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
+    # Prints the start-up timings (for benchmarks.bench_startup) and quits
+    # once the editor is ready. Normal launches log them to STARTUP_LOG_PATH.
+    benchmark = "--startup-benchmark" in sys.argv
 
     stack = QStackedWidget()
-
-    main_page = MainPage()
+    loader = EditorLoader(START, stack)
+    first_paint = []
 
     def go_to_main():
-        stack.setCurrentIndex(1)
+        stack.setCurrentWidget(loader.page())
+
+    def on_painted(seconds):
+        first_paint.append(seconds)
+        if benchmark:
+            print(f"Startup: login painted after {seconds * 1000:.0f} ms", flush=True)
+        loader.begin()
+
+    def on_editor_ready(page, seconds):
+        stack.addWidget(page)  # index 1
+        if benchmark:
+            print(f"Startup: editor ready after {seconds * 1000:.0f} ms", flush=True)
+            app.quit()
+        else:
+            log_startup(settings.STARTUP_LOG_PATH, first_paint[0], seconds)
 
     login_page = LoginPage(go_to_main)
-
     stack.addWidget(login_page)  # index 0
-    stack.addWidget(main_page)   # index 1
+
+    paint_timer = FirstPaintTimer(START, login_page)
+    paint_timer.painted.connect(on_painted)
+    loader.ready.connect(on_editor_ready)
 
     stack.showMaximized()  # Start in full screen mode
 
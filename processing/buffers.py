@@ -0,0 +1,84 @@
+import threading
+
+import numpy as np
+from PIL import Image
+
+# Frames kept as uint8 arrays in the layout Pillow and Qt share:
+# L -> HxW, RGB -> HxWx4 (RGBX, Pillow stores RGB in 4 bytes too), RGBA -> HxWx4
+#
+# copy_into() writes through Pillow's core paste (Image.im.paste), which is
+# not public API: checked with Pillow 9.1 to 12.3, see requirements.txt.
+FRAME_MODES = {"L": "L", "RGB": "RGBX", "RGBA": "RGBA"}
+
+
+def frame_shape(mode, size):
+    """Array shape copy_into() needs for an image of mode and size"""
+    w, h = size
+    return (h, w) if mode == "L" else (h, w, 4)
+
+
+def copy_into(image, out):
+    """Copy image's pixels into the uint8 array out (see frame_shape), no allocation
+
+    Only L, RGB and RGBA images are supported. RGB frames get 255 in the
+    X byte, as Qt's RGBX8888 requires. Returns out.
+    """
+    if image.mode not in FRAME_MODES:
+        raise ValueError(f"copy_into: unsupported mode {image.mode}")
+    if out.shape != frame_shape(image.mode, image.size) or out.dtype != np.uint8 or not out.flags.c_contiguous:
+        raise ValueError(f"copy_into: out must be a contiguous uint8 array of shape {frame_shape(image.mode, image.size)}")
+    raw_mode = FRAME_MODES[image.mode]
+    view = Image.frombuffer(raw_mode, image.size, out, "raw", raw_mode, 0, 1)
+    # Image.paste() would copy the read-only view first, the core paste writes through
+    # (np.asarray(image) would build a temporary frame, about 15x slower)
+    view.im.paste(image.im, (0, 0) + image.size)
+    if image.mode == "RGB":
+        # Pillow copies its padding byte as is, 0 or leftovers of point()/convert()
+        out[..., 3] = 255
+    return out
+
+
+class BufferPool:
+    """Reusable uint8 frame buffers, keyed by shape
+
+    take() hands out a free buffer of the shape (or a new one), give()
+    puts it back. At most max_free buffers per shape are kept, so a
+    change of working size doesn't pin old buffers for long. Thread-safe:
+    render workers take, the GUI thread gives back.
+    """
+
+    def __init__(self, max_free=3):
+        self.max_free = max_free
+        self.free = {}  # shape -> [arrays]
+        self.lock = threading.Lock()
+        self.allocated = 0
+        self.reused = 0
+
+    def take(self, shape):
+        with self.lock:
+            buffers = self.free.get(shape)
+            if buffers:
+                self.reused += 1
+                return buffers.pop()
+            self.allocated += 1
+        return np.empty(shape, dtype=np.uint8)
+
+    def give(self, array):
+        with self.lock:
+            buffers = self.free.setdefault(array.shape, [])
+            if len(buffers) < self.max_free:
+                buffers.append(array)
+
+    def clear(self):
+        with self.lock:
+            self.free.clear()
+
+
+def reserve_pillow_blocks(frame_bytes, frames):
+    """Let Pillow keep freed image memory for about `frames` frames of frame_bytes
+
+    Every Pillow operation allocates its output; with cached blocks those
+    come from memory freed by the previous render instead of new pages.
+    """
+    blocks_per_frame = -(-frame_bytes // Image.core.get_block_size())
+    Image.core.set_blocks_max(max(Image.core.get_blocks_max(), blocks_per_frame * frames))
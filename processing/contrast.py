@@ -1,5 +1,25 @@
-from PIL import ImageEnhance
+from PIL import Image, ImageEnhance
 
-def adjust_contrast(image, value):
-    enhancer = ImageEnhance.Contrast(image)
-    return enhancer.enhance(value)
\ No newline at end of file
+def adjust_contrast(image, value, mean=None):
+    # mean: grayscale mean of the whole frame. Pass it when image is only
+    # a tile of the frame, otherwise it is computed from image itself.
+    if mean is None:
+        enhancer = ImageEnhance.Contrast(image)
+        return enhancer.enhance(value)
+    
+    # Same as ImageEnhance.Contrast with a given mean
+    degenerate = Image.new("L", image.size, mean)
+    if degenerate.mode != image.mode:
+        degenerate = degenerate.convert(image.mode)
+    if "A" in image.getbands():
+        degenerate.putalpha(image.getchannel("A"))
+    return Image.blend(degenerate, image, value)
+
+def contrast_mean(histogram):
+    # Mean used by ImageEnhance.Contrast, from a 256-bin L histogram.
+    # Histograms of tiles can be summed first.
+    count = sum(histogram)
+    if not count:
+        return 0
+    total = sum(i * n for i, n in enumerate(histogram))
+    return int(total / count + 0.5)
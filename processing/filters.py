@@ -1,25 +1,35 @@
-from PIL import Image, ImageEnhance, ImageFilter
+from PIL import ImageEnhance
 import numpy as np
 
 def apply_neutral_filter(image):
     """No filter - returns original image"""
     return image.copy()
 
+def _scale_lut(factor):
+    """256-entry table for v -> clip(v * factor), same float32 math as the old NumPy version"""
+    values = np.arange(256, dtype=np.float32) * np.float32(factor)
+    return np.clip(values, 0, 255).astype(np.uint8).tolist()
+
+# Per-channel lookup tables (R + G + B, 768 entries) for Image.point
+WARM_LUT = _scale_lut(1.15) + _scale_lut(1.05) + _scale_lut(0.9)
+COLD_LUT = _scale_lut(0.85) + _scale_lut(1.0) + _scale_lut(1.2)
+
+# Sepia colour matrix for Image.convert. Pillow rounds (+0.5) before
+# clamping, the -0.5 offset turns that back into the truncation of astype()
+SEPIA_MATRIX = (
+    0.393, 0.769, 0.189, -0.5,
+    0.349, 0.686, 0.168, -0.5,
+    0.272, 0.534, 0.131, -0.5
+)
+
 def apply_warm_filter(image):
     """Apply warm filter - adds orange/yellow tones"""
     # Ensure RGB mode
     if image.mode != 'RGB':
         image = image.convert('RGB')
     
-    # Convert to numpy array for manipulation
-    img_array = np.array(image, dtype=np.float32)
-    
-    # Add warm tones (increase red and green, slightly decrease blue)
-    img_array[:, :, 0] = np.clip(img_array[:, :, 0] * 1.15, 0, 255)  # Red
-    img_array[:, :, 1] = np.clip(img_array[:, :, 1] * 1.05, 0, 255)  # Green
-    img_array[:, :, 2] = np.clip(img_array[:, :, 2] * 0.9, 0, 255)   # Blue
-    
-    return Image.fromarray(img_array.astype(np.uint8))
+    # Increase red and green, slightly decrease blue (one uint8 pass)
+    return image.point(WARM_LUT)
 
 def apply_cold_filter(image):
     """Apply cold filter - adds blue tones"""
@@ -27,35 +37,19 @@ def apply_cold_filter(image):
     if image.mode != 'RGB':
         image = image.convert('RGB')
     
-    # Convert to numpy array
-    img_array = np.array(image, dtype=np.float32)
-    
-    # Add cool tones (decrease red, slightly increase green and blue)
-    img_array[:, :, 0] = np.clip(img_array[:, :, 0] * 0.85, 0, 255)  # Red
-    img_array[:, :, 1] = np.clip(img_array[:, :, 1] * 1.0, 0, 255)   # Green
-    img_array[:, :, 2] = np.clip(img_array[:, :, 2] * 1.2, 0, 255)   # Blue
-    
-    return Image.fromarray(img_array.astype(np.uint8))
+    # Decrease red, increase blue (one uint8 pass)
+    return image.point(COLD_LUT)
 
-def apply_vintage_filter(image):
-    """Apply vintage filter - sepia tone with slight vignette"""
-    # Ensure RGB mode
+def apply_sepia(image):
+    """Sepia tone only (first step of the vintage filter)"""
     if image.mode != 'RGB':
         image = image.convert('RGB')
-    
-    # Convert to numpy array
-    img_array = np.array(image, dtype=np.float32)
-    
+    return image.convert('RGB', SEPIA_MATRIX)
+
+def apply_vintage_filter(image):
+    """Apply vintage filter - sepia tone with slight vignette"""
     # Apply sepia tone matrix
-    sepia_r = img_array[:, :, 0] * 0.393 + img_array[:, :, 1] * 0.769 + img_array[:, :, 2] * 0.189
-    sepia_g = img_array[:, :, 0] * 0.349 + img_array[:, :, 1] * 0.686 + img_array[:, :, 2] * 0.168
-    sepia_b = img_array[:, :, 0] * 0.272 + img_array[:, :, 1] * 0.534 + img_array[:, :, 2] * 0.131
-    
-    img_array[:, :, 0] = np.clip(sepia_r, 0, 255)
-    img_array[:, :, 1] = np.clip(sepia_g, 0, 255)
-    img_array[:, :, 2] = np.clip(sepia_b, 0, 255)
-    
-    sepia_img = Image.fromarray(img_array.astype(np.uint8))
+    sepia_img = apply_sepia(image)
     
     # Reduce contrast slightly for vintage look
     enhancer = ImageEnhance.Contrast(sepia_img)
@@ -74,3 +68,12 @@ def apply_bw_filter(image):
     
     # Convert back to RGB mode for consistency
     return bw_img.convert('RGB')
+
+# Preset list used by the editor and the render pipeline (name, function)
+FILTERS = [
+    ("Neutral", apply_neutral_filter),
+    ("Warm", apply_warm_filter),
+    ("Cold", apply_cold_filter),
+    ("Vintage", apply_vintage_filter),
+    ("Black & White", apply_bw_filter)
+]
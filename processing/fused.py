@@ -0,0 +1,157 @@
+import numpy as np
+
+from processing.brightness import adjust_brightness
+from processing.contrast import adjust_contrast, contrast_mean
+from processing.saturation import adjust_saturation
+from processing.monochrome import apply_monochrome
+
+# Brightness -> contrast -> saturation -> monochrome, composed into one
+# colour transform instead of four ImageEnhance/blend steps (each of them
+# builds a degenerate frame and blends a new one).
+#
+# Brightness and contrast are per-channel maps: composed as a 256-entry
+# LUT they match the sequential steps exactly (Pillow's blend truncates
+# a float32 result, the LUT is built the same way). Saturation and monochrome are
+# blends towards the pixel's luma; both keep luma, so they compose into a
+# single 3x3 matrix. Brightness and contrast factors up to 1 can't clip,
+# the LUT is then affine and folds into that matrix too (unless saturation
+# is above 1): the whole chain is one Image.convert(matrix) pass.
+# (Deciding from the image's value range would fold some tiles of a tiled
+# render and not others.)
+#
+# Tolerance: the sequential chain truncates after every step, the fused
+# matrix once (Image.convert rounds, an offset of -0.5 makes it truncate,
+# minus the average loss of the steps it replaces). ImageEnhance.Color
+# also blends towards a luma rounded to an integer, the matrix towards the
+# exact one. L images and brightness/contrast alone are exact; otherwise
+# over 3000 random settings 82% of values are identical, 99.9% within one
+# level and the largest difference is 2. Checked by
+# benchmarks/check_fused.py.
+TOLERANCE = 2
+
+FUSED_MODES = ('L', 'RGB', 'RGBA')
+
+# Pillow's RGB -> L weights (fixed point, /65536)
+LUMA = (19595 / 65536, 38470 / 65536, 7471 / 65536)
+
+
+def _blend_values(values, degenerate, factor):
+    # Image.blend(degenerate, image, factor) before rounding, in float32 like Pillow
+    degenerate = np.float32(degenerate)
+    return degenerate + np.float32(factor) * (values - degenerate)
+
+def _clip_truncate(values):
+    return np.floor(np.clip(values, 0, 255))
+
+def _brightness_values(bright):
+    return _clip_truncate(_blend_values(np.arange(256, dtype=np.float32), 0, bright))
+
+def input_histogram(image, bright=1.0):
+    """Gray histogram of image after brightness, the contrast step takes its mean from it
+
+    Histograms of tiles can be summed, contrast_mean() of the sum is the
+    frame's mean.
+    """
+    if bright != 1.0:
+        lut = _brightness_values(bright).astype(np.uint8).tolist()
+        image = image.point(lut * len(image.getbands()))
+    return image.convert('L').histogram()
+
+def _luma_matrix(keep):
+    # out = keep * x + (1 - keep) * luma(x), per channel
+    rows = []
+    for channel in range(3):
+        row = [(1 - keep) * weight for weight in LUMA]
+        row[channel] += keep
+        rows.append(row)
+    return rows
+
+def _convert_matrix(image, rows, gain=1.0, offset=0.0, keep_alpha=True):
+    matrix = []
+    for row in rows:
+        matrix += [gain * value for value in row] + [offset - 0.5]
+    if image.mode == 'RGBA':
+        alpha = image.getchannel('A')
+        out = image.convert('RGB').convert('RGB', tuple(matrix))
+        if keep_alpha:
+            out.putalpha(alpha)
+        return out
+    return image.convert('RGB', tuple(matrix))
+
+def _sequential(image, bright, contrast, sat, mono, mean):
+    if bright != 1.0:
+        image = adjust_brightness(image, bright)
+    if contrast != 1.0:
+        image = adjust_contrast(image, contrast, mean)
+    if sat != 1.0:
+        image = adjust_saturation(image, sat)
+    if mono > 0:
+        image = apply_monochrome(image, mono)
+    return image
+
+def fused_adjust(image, bright=1.0, contrast=1.0, sat=1.0, mono=0.0, mean=None):
+    """adjust_brightness, adjust_contrast, adjust_saturation and apply_monochrome in one transform
+
+    mean: contrast_mean(input_histogram(frame, bright)) of the whole frame,
+    pass it when image is only a tile of the frame. Matches the sequential
+    steps within TOLERANCE.
+    Modes other than L, RGB and RGBA run the sequential steps.
+    """
+    if image.mode not in FUSED_MODES:
+        return _sequential(image, bright, contrast, sat, mono, mean)
+
+    if contrast != 1.0 and mean is None:
+        mean = contrast_mean(input_histogram(image, bright))
+
+    # Brightness and contrast as one per-channel map
+    tone = None
+    if bright != 1.0 or contrast != 1.0:
+        tone = np.arange(256, dtype=np.float32)
+        for degenerate, factor in ((0, bright), (mean, contrast)):
+            if factor != 1.0:
+                tone = _clip_truncate(_blend_values(tone, degenerate, factor))
+
+    if image.mode == 'L':
+        # Saturation leaves L untouched, monochrome only converts to RGB
+        out = image.point(tone.astype(np.uint8).tolist()) if tone is not None else image
+        return out.convert('RGB') if mono > 0 else out.copy()
+
+    if sat == 1.0 and mono <= 0:
+        if tone is None:
+            return image.copy()
+        lut = tone.astype(np.uint8).tolist()
+        return image.point(lut * 3 + (list(range(256)) if image.mode == 'RGBA' else []))
+
+    keep_alpha = mono <= 0  # apply_monochrome converts to RGB
+    # Every step of the sequential chain truncates, losing half a level on
+    # average. Luma matrices keep a uniform offset, so the losses of the
+    # steps a matrix replaces (all but its last) are subtracted from it.
+    loss = 0.0
+    if sat <= 1.0 or mono <= 0:
+        # Both blend towards luma, which they keep: one matrix
+        passes = [_luma_matrix(sat * (1 - mono))]
+        if sat != 1.0 and mono > 0:
+            loss += 0.5
+    else:
+        # Over-saturated values clip before the monochrome blend sees them
+        passes = [_luma_matrix(sat), _luma_matrix(1 - mono)]
+
+    gain, offset = 1.0, 0.0
+    if tone is not None:
+        if bright <= 1.0 and contrast <= 1.0 and sat <= 1.0:
+            # Affine tone map, fold it into the matrix (not before
+            # saturation > 1, it would amplify the missing truncations)
+            gain = bright * contrast
+            if contrast != 1.0:
+                offset = (1 - contrast) * mean
+                loss += 0.5
+            if bright != 1.0:
+                loss += 0.5 * contrast
+        else:
+            lut = tone.astype(np.uint8).tolist()
+            image = image.point(lut * 3 + (list(range(256)) if image.mode == 'RGBA' else []))
+
+    image = _convert_matrix(image, passes[0], gain, offset - loss, keep_alpha)
+    for rows in passes[1:]:
+        image = _convert_matrix(image, rows, keep_alpha=keep_alpha)
+    return image
@@ -12,3 +12,75 @@ def apply_flip(image, mode):
     elif mode == 'vertical':
         return image.transpose(Image.FLIP_TOP_BOTTOM)
     return image
+
+# --- Orientation composition ---
+# Any mix of quarter-turn rotations and flips is one of the 8 dihedral
+# orientations: (quarter turns CCW, then mirror left-right or not).
+# Each maps to a single Image.transpose call (None = identity).
+ORIENTATION_TRANSPOSE = {
+    (0, False): None,
+    (0, True): Image.FLIP_LEFT_RIGHT,
+    (1, False): Image.ROTATE_90,
+    (1, True): Image.TRANSVERSE,
+    (2, False): Image.ROTATE_180,
+    (2, True): Image.FLIP_TOP_BOTTOM,
+    (3, False): Image.ROTATE_270,
+    (3, True): Image.TRANSPOSE,
+}
+
+def then_orientation(first, second):
+    """Orientation of applying first and then second"""
+    turns, mirrored = first
+    turns2, mirrored2 = second
+    # A mirror reverses the direction of any rotation applied after it
+    turns = (turns - turns2 if mirrored else turns + turns2) % 4
+    return (turns, mirrored != mirrored2)
+
+def compose_orientation(rotation, flip_h=False, flip_v=False):
+    """Orientation for rotate(rotation), then the optional flips (rotation in multiples of 90)"""
+    orientation = ((rotation // 90) % 4, False)
+    if flip_h:
+        orientation = then_orientation(orientation, (0, True))
+    if flip_v:
+        orientation = then_orientation(orientation, (2, True))  # = rotate 180 + mirror
+    return orientation
+
+def invert_orientation(orientation):
+    turns, mirrored = orientation
+    # Mirrored orientations are their own inverse
+    return orientation if mirrored else ((-turns) % 4, False)
+
+def orientation_size(size, orientation):
+    """Size of an image of the given size after the orientation is applied"""
+    w, h = size
+    return (h, w) if orientation[0] % 2 else (w, h)
+
+def orientation_box(box, size, orientation):
+    """Map a (left, top, right, bottom) box through the orientation
+
+    size is the size of the image the box is in (before the orientation).
+    """
+    left, top, right, bottom = box
+    w, h = size
+    for _ in range(orientation[0]):
+        # 90 degrees CCW: x becomes y, y becomes (w - x)
+        left, top, right, bottom = top, w - right, bottom, w - left
+        w, h = h, w
+    if orientation[1]:
+        left, right = w - right, w - left
+    return (left, top, right, bottom)
+
+def transpose_orientation(image, orientation):
+    # Single transpose, returns the image itself for the identity
+    method = ORIENTATION_TRANSPOSE[orientation]
+    if method is None:
+        return image
+    return image.transpose(method)
+
+def apply_orientation(image, rotation, flip_h=False, flip_v=False):
+    # Same result as apply_rotate + apply_flip, in one pass.
+    # Returns the image itself (no copy) when nothing changes.
+    if rotation % 90 != 0:
+        image = apply_rotate(image, rotation)
+        rotation = 0
+    return transpose_orientation(image, compose_orientation(rotation, flip_h, flip_v))
@@ -0,0 +1,34 @@
+import numpy as np
+from PIL import Image
+
+
+def sample_size(size, max_pixels):
+    """Size of a nearest-neighbour subsample with at most max_pixels pixels"""
+    w, h = size
+    if not max_pixels or w * h <= max_pixels:
+        return size
+    step = int(np.ceil(np.sqrt(w * h / max_pixels)))
+    return (max(1, w // step), max(1, h // step))
+
+
+def frame_histogram(image, max_pixels=None):
+    """Red, green, blue and luma histograms of image as a 4x256 NumPy array
+
+    With max_pixels the image is subsampled first (nearest neighbour, so
+    every counted value is a real pixel value). Counting runs in Pillow's
+    C histogram, one pass for the channels and one for luma.
+    """
+    size = sample_size(image.size, max_pixels)
+    if size != image.size:
+        image = image.resize(size, Image.NEAREST)
+    if image.mode not in ('L', 'RGB', 'RGBA'):
+        image = image.convert('RGB')
+
+    histogram = np.zeros((4, 256), dtype=np.int64)
+    if image.mode == 'L':
+        histogram[:] = image.histogram()
+        return histogram
+    channels = np.asarray(image.histogram(), dtype=np.int64)
+    histogram[:3] = channels[:768].reshape(3, 256)
+    histogram[3] = image.convert('L').histogram()
+    return histogram
@@ -0,0 +1,203 @@
+from PIL import Image
+from processing.brightness import adjust_brightness
+from processing.contrast import adjust_contrast, contrast_mean
+from processing.sharpen import apply_sharpen
+from processing.fused import FUSED_MODES, fused_adjust, input_histogram
+from processing.geometry import (
+    apply_orientation, compose_orientation, invert_orientation, orientation_box,
+    orientation_size, transpose_orientation
+)
+from processing.filters import (
+    FILTERS, apply_neutral_filter, apply_warm_filter, apply_cold_filter,
+    apply_vintage_filter, apply_bw_filter, apply_sepia
+)
+
+# Rows of context the sharpen step needs around a tile
+# (UnsharpMask radius 2 -> three box-blur passes of up to 2 pixels each)
+SHARPEN_HALO = 8
+
+# Edit state as produced by MemoryLensGUI.get_current_state()
+# Slider values are stored x100, crop_box is normalized (0.0 - 1.0)
+DEFAULT_STATE = {
+    'bright': 100,
+    'contrast': 100,
+    'sat': 100,
+    'mono': 0,
+    'sharp': 0,
+    'rotation': 0,
+    'flip_h': False,
+    'flip_v': False,
+    'crop_box': None,
+    'filter_index': 0
+}
+
+class RenderCancelled(Exception):
+    """Raised by render() when should_cancel() says the job is stale"""
+
+def _check_cancel(should_cancel):
+    if should_cancel is not None and should_cancel():
+        raise RenderCancelled()
+
+def crop_box_to_pixels(crop_box, size):
+    """Map a normalized (left, top, right, bottom) box to pixel coordinates"""
+    w, h = size
+    left, top, right, bottom = crop_box
+    return (
+        int(round(left * w)), int(round(top * h)),
+        int(round(right * w)), int(round(bottom * h))
+    )
+
+def _to_grayscale(image):
+    return image.convert('L')
+
+def _to_rgb(image):
+    return image.convert('RGB')
+
+class Stage:
+    """One step of the edit chain after geometry and crop
+
+    kind tells the tiled executor what the step needs:
+    'point' - pixel-wise, runs on any tile as is
+    'mean'  - contrast, needs the grayscale mean of the whole frame
+    'halo'  - neighbourhood op, tiles need `halo` extra rows on each side
+    'frame' - unknown, only runs on the whole frame
+    """
+
+    def __init__(self, kind, func, *args, halo=0):
+        self.kind = kind
+        self.func = func
+        self.args = args
+        self.halo = halo
+
+    @property
+    def name(self):
+        return self.func.__name__.lstrip('_')
+
+    def apply(self, image, mean=None):
+        if self.kind == 'mean':
+            return self.func(image, *self.args, mean=mean)
+        return self.func(image, *self.args)
+
+    def histogram(self, image):
+        """Statistics a 'mean' stage needs from its input (summable across tiles)"""
+        return image.convert('L').histogram()
+
+    def frame_mean(self, histogram):
+        return contrast_mean(histogram)
+
+class FusedStage(Stage):
+    """Brightness, contrast, saturation and monochrome as one fused_adjust() pass
+
+    The contrast mean is taken after brightness, from the gray histogram
+    of the brightened stage input.
+    """
+
+    def __init__(self, bright, contrast, sat, mono):
+        kind = 'mean' if contrast != 1.0 else 'point'
+        super().__init__(kind, fused_adjust, bright, contrast, sat, mono)
+
+    def histogram(self, image):
+        if image.mode in FUSED_MODES:
+            return input_histogram(image, self.args[0])
+        # Other modes run the steps one by one
+        return adjust_brightness(image, self.args[0]).convert('L').histogram()
+
+def filter_stages(filter_func):
+    """Split a preset into stages (presets with an inner contrast step need two passes)"""
+    if filter_func is apply_neutral_filter:
+        return []
+    if filter_func in (apply_warm_filter, apply_cold_filter):
+        return [Stage('point', filter_func)]
+    if filter_func is apply_vintage_filter:
+        return [Stage('point', apply_sepia), Stage('mean', adjust_contrast, 0.9)]
+    if filter_func is apply_bw_filter:
+        return [
+            Stage('point', _to_grayscale),
+            Stage('mean', adjust_contrast, 1.2),
+            Stage('point', _to_rgb)
+        ]
+    return [Stage('frame', filter_func)]
+
+def build_stages(state, filters=FILTERS):
+    """Stages for everything after geometry and crop, in render order"""
+    state = {**DEFAULT_STATE, **state}
+
+    # --- FILTER (Third) ---
+    stages = filter_stages(filters[state['filter_index']][1])
+
+    # Get all values
+    bright_factor = state['bright'] / 100.0
+    contrast_factor = state['contrast'] / 100.0
+    sat_factor = state['sat'] / 100.0
+    mono_factor = state['mono'] / 100.0
+    sharp_factor = state['sharp'] / 100.0
+
+    # Brightness, contrast, saturation and monochrome in one colour transform
+    if bright_factor != 1.0 or contrast_factor != 1.0 or sat_factor != 1.0 or mono_factor > 0:
+        stages.append(FusedStage(bright_factor, contrast_factor, sat_factor, mono_factor))
+
+    if sharp_factor > 0:
+        stages.append(Stage('halo', apply_sharpen, sharp_factor, halo=SHARPEN_HALO))
+
+    return stages
+
+def render(image, state, filters=FILTERS, should_cancel=None, progress=None, timer=None):
+    """Run the whole edit chain described by state on image
+
+    should_cancel is polled between stages; if it returns True the render
+    stops early with RenderCancelled. progress, if given, is called with
+    the finished fraction (0.0 - 1.0) after each stage. timer, a
+    profiling.FrameTimer, gets a mark after each step.
+    """
+    state = {**DEFAULT_STATE, **state}
+
+    if state['crop_box'] and state['rotation'] % 90 == 0:
+        # --- CROP first, in source coordinates ---
+        # crop_box is relative to the oriented frame: map it back through the
+        # orientation, so only the kept pixels are transposed (same result)
+        orientation = compose_orientation(state['rotation'], state['flip_h'], state['flip_v'])
+        oriented_size = orientation_size(image.size, orientation)
+        box = crop_box_to_pixels(state['crop_box'], oriented_size)
+        img = image.crop(orientation_box(box, oriented_size, invert_orientation(orientation)))
+        if timer:
+            timer.mark('crop')
+        img = transpose_orientation(img, orientation)
+        if timer:
+            timer.mark('orientation')
+    else:
+        # --- Geometry Transforms (First) ---
+        # One transpose for rotation + flips. No defensive copy of the
+        # original: every later step returns a new image.
+        img = apply_orientation(image, state['rotation'], state['flip_h'], state['flip_v'])
+        if timer:
+            timer.mark('orientation')
+
+        # --- CROP (Second) ---
+        if state['crop_box']:
+            img = img.crop(crop_box_to_pixels(state['crop_box'], img.size))
+            if timer:
+                timer.mark('crop')
+
+    # --- FILTER and adjustments ---
+    stages = build_stages(state, filters)
+    for index, stage in enumerate(stages):
+        _check_cancel(should_cancel)
+        img = stage.apply(img)
+        if timer:
+            timer.mark(stage.name)
+        if progress:
+            progress((index + 1) / len(stages))
+
+    if img is image:
+        img = img.copy()  # Never hand out the caller's image
+    return img
+
+def make_proxy(image, max_side):
+    """Downscale image so its long edge is at most max_side (no copy if already small)"""
+    w, h = image.size
+    if max(w, h) <= max_side:
+        return image
+    ratio = max_side / max(w, h)
+    size = (max(1, int(w * ratio)), max(1, int(h * ratio)))
+    # reducing_gap lets Pillow box-reduce first, much faster on huge photos
+    return image.resize(size, Image.BILINEAR, reducing_gap=2.0)
@@ -0,0 +1,127 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Upper edges (ms) of the latency histogram buckets, the last bucket is open
+HISTOGRAM_EDGES_MS = (8, 16, 33, 50, 100, 200, 500, 1000)
+
+# Trace-event thread ids for the thread names used in spans
+TRACE_THREADS = {"GUI": 1, "worker": 2}
+
+
+def _thread_name():
+    if threading.current_thread() is threading.main_thread():
+        return "GUI"
+    return "worker"
+
+
+class FrameTimer:
+    """Back-to-back stage timings of one frame, from request to display
+
+    mark(name) closes a span that started at the previous mark (or at
+    creation). Code that gets a timer of None skips timing altogether,
+    so disabled profiling costs one `if` per stage. Marks may come from
+    the render thread while the GUI thread waits for the result.
+    """
+
+    def __init__(self, label="frame"):
+        self.label = label
+        self.start = time.perf_counter()
+        self.last = self.start
+        self.spans = []  # (name, start, end, thread name)
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.spans.append((name, self.last, now, _thread_name()))
+        self.last = now
+
+    @property
+    def total(self):
+        return self.last - self.start
+
+
+class Profiler:
+    """Collects finished frames: rolling latency stats and trace events"""
+
+    def __init__(self, history=200, max_events=200000):
+        self.frames = deque(maxlen=history)
+        self.events = deque(maxlen=max_events)
+        self.origin = time.perf_counter()
+
+    def frame(self, label="frame"):
+        return FrameTimer(label)
+
+    def record(self, timer):
+        self.frames.append(timer)
+        pid = os.getpid()
+
+        def event(name, start, end, thread, category):
+            return {
+                "name": name, "cat": category, "ph": "X", "pid": pid, "tid": TRACE_THREADS[thread],
+                "ts": (start - self.origin) * 1e6, "dur": (end - start) * 1e6,
+            }
+        self.events.append(event(timer.label, timer.start, timer.last, "GUI", "frame"))
+        for name, start, end, thread in timer.spans:
+            self.events.append(event(name, start, end, thread, "stage"))
+
+    def latencies_ms(self):
+        return [frame.total * 1000 for frame in self.frames]
+
+    def histogram(self):
+        """Frame count per HISTOGRAM_EDGES_MS bucket (plus one open bucket)"""
+        counts = [0] * (len(HISTOGRAM_EDGES_MS) + 1)
+        for ms in self.latencies_ms():
+            bucket = 0
+            while bucket < len(HISTOGRAM_EDGES_MS) and ms > HISTOGRAM_EDGES_MS[bucket]:
+                bucket += 1
+            counts[bucket] += 1
+        return counts
+
+    def percentile(self, fraction):
+        values = sorted(self.latencies_ms())
+        if not values:
+            return 0.0
+        return values[min(len(values) - 1, int(fraction * len(values)))]
+
+    def stage_means_ms(self):
+        """{stage: mean ms per frame it appeared in}, over the history"""
+        totals = {}
+        for frame in self.frames:
+            for name, start, end, _ in frame.spans:
+                total, count = totals.get(name, (0.0, 0))
+                totals[name] = (total + (end - start) * 1000, count + 1)
+        return {name: total / count for name, (total, count) in totals.items()}
+
+    def summary(self, bar_width=20):
+        """Multi-line text for the debug overlay"""
+        if not self.frames:
+            return "No frames yet"
+        last = self.frames[-1]
+        means = self.stage_means_ms()
+        lines = [f"{last.label}: {last.total * 1000:.1f} ms   (stage  last / mean ms)"]
+        for name, start, end, thread in last.spans:
+            lines.append(f"  {name:<20} {(end - start) * 1000:7.1f} / {means[name]:6.1f}  {thread}")
+
+        counts = self.histogram()
+        peak = max(counts) or 1
+        lines.append(f"Last {len(self.frames)} frames: p50 {self.percentile(0.5):.1f} ms, "
+                     f"p95 {self.percentile(0.95):.1f} ms")
+        low = 0
+        for edge, count in zip(HISTOGRAM_EDGES_MS + (None,), counts):
+            label = f"{low:>4}-{edge:<4}" if edge else f"{low:>4}+    "
+            lines.append(f"  {label} ms {'#' * round(count / peak * bar_width):<{bar_width}} {count}")
+            low = edge
+        return "\n".join(lines)
+
+    def export_trace(self, path):
+        """Write the recorded spans as Chrome trace-event JSON (chrome://tracing, Perfetto)"""
+        pid = os.getpid()
+        names = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread}}
+            for thread, tid in TRACE_THREADS.items()
+        ]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": names + list(self.events), "displayTimeUnit": "ms"}, f)
+        return len(self.events)
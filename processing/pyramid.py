@@ -0,0 +1,30 @@
+# Modes Image.reduce() handles, other images get a single-level pyramid
+REDUCE_MODES = ("L", "LA", "RGB", "RGBA", "CMYK", "YCbCr", "I", "F")
+
+
+def build_pyramid(image, min_side=256):
+    """Mipmap levels of image: [image, 1/2, 1/4, ...]
+
+    Each level is a 2x2 box average of the one before (Image.reduce),
+    down to the first level whose long edge is below min_side * 2.
+    Level 0 is image itself, not a copy.
+    """
+    levels = [image]
+    if image.mode not in REDUCE_MODES:
+        return levels
+    while max(levels[-1].size) >= min_side * 2 and min(levels[-1].size) >= 2:
+        levels.append(levels[-1].reduce(2))
+    return levels
+
+
+def level_index(levels, max_side):
+    """Index of the smallest level whose long edge is at least max_side (0 if none is)"""
+    for index in range(len(levels) - 1, 0, -1):
+        if max(levels[index].size) >= max_side:
+            return index
+    return 0
+
+
+def nearest_level(levels, max_side):
+    """Smallest level whose long edge is at least max_side (level 0 if none is)"""
+    return levels[level_index(levels, max_side)]
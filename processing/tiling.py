@@ -0,0 +1,287 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from PIL import Image
+
+from processing.filters import FILTERS
+from processing.geometry import (
+    compose_orientation, invert_orientation, orientation_box,
+    orientation_size, transpose_orientation
+)
+from processing.pipeline import (
+    DEFAULT_STATE, build_stages, crop_box_to_pixels, render, _check_cancel
+)
+
+# Working memory for one band, on top of the source and the output frame
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+
+# Pillow keeps RGB/RGBA pixels in 4 bytes. A band is alive in a few copies
+# at once: source crop, transposed crop, stage input, stage output and the
+# degenerate image ImageEnhance blends with.
+BYTES_PER_PIXEL = 4
+BAND_COPIES = 5
+MIN_BAND_ROWS = 16
+
+# With several workers, split the frame into at least this many bands per
+# worker so they all stay busy until the end
+BANDS_PER_WORKER = 2
+
+# One thread pool per (pool name, worker count). Exports use their own
+# pool, so preview bands never queue behind the bands of a long export.
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+class FrameLayout:
+    """Where the rows of the rendered frame come from in the source image"""
+
+    def __init__(self, image, state):
+        self.image = image
+        self.orientation = compose_orientation(state['rotation'], state['flip_h'], state['flip_v'])
+        oriented_size = orientation_size(image.size, self.orientation)
+        if state['crop_box']:
+            self.box = crop_box_to_pixels(state['crop_box'], oriented_size)
+        else:
+            self.box = (0, 0) + oriented_size
+        self.oriented_size = oriented_size
+        self.width = self.box[2] - self.box[0]
+        self.height = self.box[3] - self.box[1]
+
+    def rows(self, top, bottom):
+        """Rows [top, bottom) of the oriented and cropped frame"""
+        return self.region((0, top, self.width, bottom))
+
+    def region(self, box):
+        """The (left, top, right, bottom) box of the oriented and cropped frame"""
+        frame_left, frame_top = self.box[:2]
+        left, top, right, bottom = box
+        region = (frame_left + left, frame_top + top, frame_left + right, frame_top + bottom)
+        # Crop the source first, so only the region's pixels are transposed
+        source_box = orientation_box(region, self.oriented_size, invert_orientation(self.orientation))
+        return transpose_orientation(self.image.crop(source_box), self.orientation)
+
+
+def band_rows(width, memory_budget, halo=0):
+    """Rows per band that keep one band within memory_budget bytes"""
+    row_bytes = max(1, width) * BYTES_PER_PIXEL * BAND_COPIES
+    return max(MIN_BAND_ROWS, memory_budget // row_bytes - 2 * halo)
+
+
+def render_region(layout, stages, means, box):
+    """Run stages on a box of the frame, with enough context around it for the halo stages"""
+    left, top, right, bottom = box
+    halo = sum(stage.halo for stage in stages)
+    context = (max(0, left - halo), max(0, top - halo),
+               min(layout.width, right + halo), min(layout.height, bottom + halo))
+
+    tile = layout.region(context)
+    for stage, mean in zip(stages, means):
+        tile = stage.apply(tile, mean)
+
+    if context == tuple(box):
+        return tile
+    x, y = left - context[0], top - context[1]
+    return tile.crop((x, y, x + right - left, y + bottom - top))
+
+
+def _run_band(layout, stages, means, top, bottom):
+    """Run stages on rows [top, bottom), with enough context rows for the halo stages"""
+    return render_region(layout, stages, means, (0, top, layout.width, bottom))
+
+
+def _bands(height, rows):
+    for top in range(0, height, rows):
+        yield top, min(height, top + rows)
+
+
+def _executor(workers, pool="render"):
+    with _executors_lock:
+        executor = _executors.get((pool, workers))
+        if executor is None:
+            executor = ThreadPoolExecutor(workers, thread_name_prefix=pool)
+            _executors[(pool, workers)] = executor
+        return executor
+
+
+def _map_bands(func, bands, workers, should_cancel, band_done, pool="render"):
+    """Yield (top, func(top, bottom)) for each band, in completion order
+
+    With workers > 1 the bands run on a shared thread pool: Pillow releases
+    the GIL while it processes pixels, so bands render on several cores.
+    """
+    if workers <= 1:
+        for top, bottom in bands:
+            _check_cancel(should_cancel)
+            yield top, func(top, bottom)
+            band_done()
+        return
+
+    def run(top, bottom):
+        _check_cancel(should_cancel)  # Skip queued bands of a cancelled render
+        return func(top, bottom)
+
+    executor = _executor(workers, pool)
+    futures = {executor.submit(run, top, bottom): top for top, bottom in bands}
+    try:
+        for future in as_completed(futures):
+            _check_cancel(should_cancel)
+            yield futures[future], future.result()
+            band_done()
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def render_tiled(image, state, filters=FILTERS, memory_budget=DEFAULT_MEMORY_BUDGET,
+                 should_cancel=None, progress=None, workers=1, timer=None, pool="render"):
+    """Same result as pipeline.render(), processed in row bands
+
+    Peak working memory stays around memory_budget (plus the source image
+    and the output frame). Each band is cut straight from the source and
+    transposed on its own, so the oriented full frame never exists.
+    Contrast steps need the mean of the whole frame: it is collected from
+    band histograms in an extra pass before the bands are rendered.
+    workers > 1 renders that many bands at once (the budget is shared) on
+    the thread pool named pool. should_cancel, progress and timer work as
+    in pipeline.render().
+    """
+    state = {**DEFAULT_STATE, **state}
+    stages = build_stages(state, filters)
+
+    # Arbitrary angles and unknown filters need the whole frame
+    if state['rotation'] % 90 != 0 or any(stage.kind == 'frame' for stage in stages):
+        return render(image, state, filters, should_cancel, progress, timer)
+
+    layout = FrameLayout(image, state)
+    halo = sum(stage.halo for stage in stages)
+    workers = max(1, workers)
+    rows = band_rows(layout.width, memory_budget // workers, halo)
+    if workers > 1:
+        rows = min(rows, max(MIN_BAND_ROWS, -(-layout.height // (workers * BANDS_PER_WORKER))))
+
+    band_count = -(-layout.height // rows)
+    passes = 1 + sum(1 for stage in stages if stage.kind == 'mean')
+    done = 0
+
+    def band_done():
+        nonlocal done
+        done += 1
+        if progress:
+            progress(done / (band_count * passes))
+
+    # Pass 1: whole-frame grayscale means for the contrast stages
+    means = [None] * len(stages)
+    for index, stage in enumerate(stages):
+        if stage.kind != 'mean':
+            continue
+        def band_histogram(top, bottom, index=index):
+            band = _run_band(layout, stages[:index], means[:index], top, bottom)
+            return stages[index].histogram(band)
+
+        histogram = None
+        for _, band_hist in _map_bands(band_histogram, _bands(layout.height, rows),
+                                       workers, should_cancel, band_done, pool):
+            if histogram is None:
+                histogram = band_hist
+            else:
+                histogram = [a + b for a, b in zip(histogram, band_hist)]
+        means[index] = stage.frame_mean(histogram) if histogram else 0
+    if timer and passes > 1:
+        timer.mark('frame_means')
+
+    # Pass 2: render the bands into the output frame
+    def render_band(top, bottom):
+        return _run_band(layout, stages, means, top, bottom)
+
+    output = None
+    for top, band in _map_bands(render_band, _bands(layout.height, rows),
+                                workers, should_cancel, band_done, pool):
+        if output is None:
+            output = Image.new(band.mode, (layout.width, layout.height))
+            if band.mode == 'P':
+                output.putpalette(band.getpalette())
+        output.paste(band, (0, top))
+
+    if output is None:
+        # Empty crop, nothing to tile
+        return render(image, state, filters, should_cancel, progress, timer)
+    if timer:
+        timer.mark(f'bands x{workers}')
+    return output
+
+
+def render_full_resolution(image, state, filters=FILTERS, tiled_min_pixels=40 * 1000 * 1000,
+                           memory_budget=DEFAULT_MEMORY_BUDGET, should_cancel=None, progress=None,
+                           workers=1):
+    """render() for normal photos, render_tiled() from tiled_min_pixels up or with several workers
+
+    Bands run on the "export" thread pool, next to (not ahead of) preview renders.
+    """
+    w, h = image.size
+    if w * h >= tiled_min_pixels or workers > 1:
+        return render_tiled(image, state, filters, memory_budget, should_cancel, progress, workers,
+                            pool="export")
+    return render(image, state, filters, should_cancel, progress)
+
+
+def render_parallel(image, state, filters=FILTERS, workers=1, min_pixels=1000 * 1000,
+                    should_cancel=None, progress=None, timer=None):
+    """render() split into row bands over workers threads, for interactive previews
+
+    Frames below min_pixels render on one thread, splitting them costs
+    more than it saves. The result is identical to render().
+    """
+    w, h = image.size
+    if workers > 1 and w * h >= min_pixels:
+        return render_tiled(image, state, filters, DEFAULT_MEMORY_BUDGET, should_cancel,
+                            progress, workers, timer)
+    return render(image, state, filters, should_cancel, progress, timer)
+
+
+def frame_means(image, state, stages):
+    """Whole-frame means for the 'mean' stages, measured on image
+
+    Pass the preview proxy to render regions of a larger level of the same
+    photo: they then share its contrast means and match the preview (a full
+    render of the larger level may differ by a level).
+    """
+    means = [None] * len(stages)
+    mean_stages = [index for index, stage in enumerate(stages) if stage.kind == 'mean']
+    if not mean_stages:
+        return means
+    layout = FrameLayout(image, state)
+    frame = layout.rows(0, layout.height)
+    for index, stage in enumerate(stages[:mean_stages[-1] + 1]):
+        if stage.kind == 'mean':
+            histogram = stage.histogram(frame)
+            means[index] = stage.frame_mean(histogram) if frame.width and frame.height else 0
+        frame = stage.apply(frame, means[index])
+    return means
+
+
+def visible_tiles(view, width, height, tile_size):
+    """[((column, row), box)] of the tile grid over a width x height frame that view overlaps
+
+    view is a (left, top, right, bottom) box in frame pixels, boxes are
+    clipped to the frame.
+    """
+    left, top = max(0, int(view[0])), max(0, int(view[1]))
+    right, bottom = min(width, int(view[2]) + 1), min(height, int(view[3]) + 1)
+    tiles = []
+    for row in range(top // tile_size, -(-bottom // tile_size)):
+        for column in range(left // tile_size, -(-right // tile_size)):
+            x, y = column * tile_size, row * tile_size
+            tiles.append(((column, row), (x, y, min(width, x + tile_size), min(height, y + tile_size))))
+    return tiles
+
+
+def render_tiles(layout, stages, means, tiles, workers=1, should_cancel=None):
+    """Yield (index, tile image) for each (index, box) of tiles, in completion order
+
+    Tiles render like bands of render_tiled() (workers > 1 renders that
+    many at once). should_cancel is checked before each tile.
+    """
+    def render_tile(index, box):
+        return render_region(layout, stages, means, box)
+
+    yield from _map_bands(render_tile, tiles, workers, should_cancel, lambda: None)
@@ -0,0 +1,69 @@
+# Application settings
+import os
+
+# Preview proxy: interactive edits render on a downscaled copy of the photo
+# whose long edge is the image panel's long edge times this factor.
+# 1.0 = panel resolution, 2.0 = sharper preview on HiDPI screens.
+PROXY_SCALE = 1.0
+
+# While a slider is dragged, frames render on a coarse copy at this
+# fraction of the panel size; the proxy-resolution frame follows once
+# input has been idle for REFINE_DELAY_MS.
+COARSE_PREVIEW_SCALE = 0.25
+REFINE_DELAY_MS = 150
+
+# Full-resolution renders (save/export) of photos above this size run in
+# row bands, keeping working memory near TILE_MEMORY_BUDGET bytes.
+TILED_RENDER_MIN_PIXELS = 40 * 1000 * 1000
+TILE_MEMORY_BUDGET = 256 * 1024 * 1024
+
+# Zoomed-in views render only the visible tiles (TILE_SIZE pixels square)
+# of the nearest mipmap level. Rendered tiles are cached up to
+# TILE_CACHE_BUDGET bytes, so panning back reuses them. MAX_ZOOM is in
+# screen pixels per photo pixel.
+TILE_SIZE = 256
+TILE_CACHE_BUDGET = 128 * 1024 * 1024
+MAX_ZOOM = 4.0
+
+# Memory budget (bytes) for the cache of rendered previews, so undo/redo
+# and going back to a recently seen edit skip rendering.
+RENDER_CACHE_BUDGET = 256 * 1024 * 1024
+
+# Folder browsing (Open Folder, then swipe between photos): this many
+# photos on each side of the current one are decoded ahead of time, and
+# decoded previews are kept up to DECODE_CACHE_BUDGET bytes.
+FOLDER_PREFETCH = 2
+DECODE_CACHE_BUDGET = 256 * 1024 * 1024
+
+# The full-resolution decode of an opened photo starts once the user has
+# stayed on it this long (or right away for an export or a zoom), fast
+# swipes don't decode every photo they pass
+FULL_LOAD_DELAY_MS = 400
+
+# Start-up timings (first paint of the login page, editor ready) are
+# appended to this CSV on every launch
+STARTUP_LOG_PATH = "user_data/startup_times.csv"
+
+# Album folder and the SQLite file with its browser thumbnails
+ALBUM_PATH = "user_data/albums/"
+THUMBNAIL_CACHE_PATH = "user_data/thumbnails.db"
+
+# Full frames of freed image memory Pillow keeps for reuse, so each preview
+# render (several passes, each with a new output image) recycles memory
+# instead of allocating fresh pages.
+RENDER_BUFFER_FRAMES = 6
+
+# Threads one render is split across (row bands, Pillow releases the GIL
+# while processing pixels). None = all cores, 1 = single-threaded.
+RENDER_WORKERS = None
+
+# Preview frames below this many pixels render on one thread
+PARALLEL_MIN_PIXELS = 1000 * 1000
+
+
+def render_workers():
+    return RENDER_WORKERS or os.cpu_count() or 1
+
+# The live histogram is counted on a subsample of the preview frame with
+# at most this many pixels
+HISTOGRAM_SAMPLE_PIXELS = 250 * 1000
@@ -0,0 +1,179 @@
+import hashlib
+import json
+import os
+from collections import namedtuple
+
+from PIL import Image
+
+from storage.save_image import save_to_album
+
+# Album entries are non-destructive: a JSON sidecar keeps a reference to the
+# original file and the edit recipe, next to a cached render and thumbnail.
+#   image_<timestamp>.jpg        cached full render
+#   image_<timestamp>.thumb.jpg  thumbnail
+#   image_<timestamp>.json       sidecar
+ENTRY_VERSION = 1
+THUMBNAIL_SIZE = (256, 256)
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+# One item of the album browser. path is the image shown, entry the sidecar
+# (None for plain images), thumb_source the file thumbnails are made from.
+AlbumItem = namedtuple("AlbumItem", "path entry thumb_source size mtime")
+
+
+def file_hash(path, chunk_size=1024 * 1024):
+    sha1 = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+def source_info(path, previous=None):
+    """Reference to the original file (hash reused while size and mtime are unchanged)"""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    info = {"path": path, "size": stat.st_size, "mtime": stat.st_mtime}
+    if previous and all(previous.get(k) == info[k] for k in ("path", "size", "mtime")):
+        info["sha1"] = previous["sha1"]
+    else:
+        info["sha1"] = file_hash(path)
+    return info
+
+
+def recipe_key(recipe, source_sha1):
+    """Identifies a render: changes when the recipe or the source file changes"""
+    data = json.dumps(recipe, sort_keys=True) + source_sha1
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+
+def sidecar_path(render_path):
+    return os.path.splitext(render_path)[0] + ".json"
+
+
+def thumbnail_path(render_path):
+    return os.path.splitext(render_path)[0] + ".thumb.jpg"
+
+
+def load_entry(entry_path):
+    with open(entry_path) as f:
+        entry = json.load(f)
+    if entry["recipe"].get("crop_box"):
+        entry["recipe"]["crop_box"] = tuple(entry["recipe"]["crop_box"])
+    return entry
+
+
+def _write_entry(entry_path, entry):
+    # Write then rename, a crash never leaves a half-written sidecar
+    temp_path = entry_path + ".tmp"
+    with open(temp_path, "w") as f:
+        json.dump(entry, f, indent=2)
+    os.replace(temp_path, entry_path)
+
+
+def _write_thumbnail(image, render_path):
+    # Box-reduce the full-resolution render first (like a mipmap level at
+    # least twice the thumbnail size), only that small copy is converted
+    factor = max(image.size) // (2 * max(THUMBNAIL_SIZE))
+    if factor > 1 and image.mode in ("L", "RGB", "RGBA"):
+        image = image.reduce(factor)
+    thumb = image.convert("RGB")
+    thumb.thumbnail(THUMBNAIL_SIZE)
+    thumb.save(thumbnail_path(render_path), format="JPEG", quality=85)
+
+
+def _write_render(image, render_path, quality=95):
+    image.convert("RGB").save(render_path, format="JPEG", quality=quality)
+    _write_thumbnail(image, render_path)
+
+
+def entry_render_path(entry_path, entry):
+    return os.path.join(os.path.dirname(entry_path), entry["render"])
+
+
+def save_entry(render_func, source_path, recipe, album_path, entry_path=None):
+    """Save an album entry (new one, or update entry_path), returns the sidecar path
+
+    render_func() returns the full-resolution result of recipe applied to
+    source_path. It is not called when updating an entry whose recipe and
+    source are unchanged, nothing is written then.
+    """
+    previous = load_entry(entry_path) if entry_path else None
+    source = source_info(source_path, previous["source"] if previous else None)
+    key = recipe_key(recipe, source["sha1"])
+
+    if previous:
+        render_path = entry_render_path(entry_path, previous)
+        if previous.get("render_key") == key and os.path.exists(render_path):
+            return entry_path
+        _write_render(render_func(), render_path)
+    else:
+        rendered = render_func()
+        render_path = save_to_album(rendered, album_path)
+        entry_path = sidecar_path(render_path)
+        _write_thumbnail(rendered, render_path)
+
+    _write_entry(entry_path, {
+        "version": ENTRY_VERSION,
+        "source": source,
+        "recipe": recipe,
+        "render": os.path.basename(render_path),
+        "thumbnail": os.path.basename(thumbnail_path(render_path)),
+        "render_key": key,
+    })
+    return entry_path
+
+
+def is_render_stale(entry_path, entry=None):
+    entry = entry or load_entry(entry_path)
+    if not os.path.exists(entry_render_path(entry_path, entry)):
+        return True
+    source = source_info(entry["source"]["path"], entry["source"])
+    return recipe_key(entry["recipe"], source["sha1"]) != entry.get("render_key")
+
+
+def ensure_render(entry_path, render_func):
+    """Path of the entry's render, re-rendered first if the recipe or source changed
+
+    render_func(image, recipe) returns the full-resolution result.
+    """
+    entry = load_entry(entry_path)
+    render_path = entry_render_path(entry_path, entry)
+    if not is_render_stale(entry_path, entry):
+        return render_path
+
+    source = source_info(entry["source"]["path"], entry["source"])
+    with Image.open(source["path"]) as image:
+        rendered = render_func(image, entry["recipe"])
+    _write_render(rendered, render_path)
+
+    entry["source"] = source
+    entry["render_key"] = recipe_key(entry["recipe"], source["sha1"])
+    _write_entry(entry_path, entry)
+    return render_path
+
+
+def scan_album(album_path):
+    """List album items (sorted by path), one per entry or plain image
+
+    Only stats files, nothing is decoded. Renders and thumbnails that
+    belong to an entry are not listed separately.
+    """
+    items = []
+    for root, _, files in os.walk(album_path):
+        names = set(files)
+        entries = {name[:-5] for name in names if name.endswith(".json")}
+        for name in sorted(names):
+            if name.endswith(".thumb.jpg") or not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            stem = os.path.splitext(name)[0]
+            entry = os.path.join(root, stem + ".json") if stem in entries else None
+            thumb_name = stem + ".thumb.jpg"
+            thumb_source = os.path.join(root, thumb_name) if thumb_name in names else path
+            try:
+                stat = os.stat(thumb_source)
+            except OSError:
+                continue  # Deleted while scanning
+            items.append(AlbumItem(path, entry, thumb_source, stat.st_size, stat.st_mtime))
+    return items
@@ -1,5 +1,71 @@
-def compress_image(image, output_path, quality=70):
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+# Most trial encodes compress_to_size() runs at once. A binary search
+# needs about 7 (95 qualities), wider rounds mostly add wasted encodes.
+MAX_SEARCH_WORKERS = 3
+
+
+def encode_jpeg(image, quality):
+    """JPEG bytes of image at quality, encoded in memory"""
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def compress_to_size(image, max_bytes, min_quality=1, max_quality=95, workers=1):
+    """Highest JPEG quality in [min_quality, max_quality] whose encode fits in max_bytes
+
+    Searches the quality with in-memory encodes: binary search, or with
+    workers > 1 that many trial encodes at once per round (Pillow encodes
+    without the GIL, at most MAX_SEARCH_WORKERS), splitting the remaining
+    range into workers + 1 parts. Returns (data, quality, attempts), attempts being the number
+    of encodes. Raises ValueError if min_quality doesn't fit either.
+    """
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    workers = min(max(1, workers), MAX_SEARCH_WORKERS)
+    # Image.save() keeps its options on the image, so each trial encode at
+    # the same time needs its own copy (at most MAX_SEARCH_WORKERS - 1 extra)
+    images = [image] + [image.copy() for _ in range(workers - 1)]
+    fits, too_big = min_quality - 1, max_quality + 1  # Known bounds, none yet
+    best = None
+    attempts = 0
+    with ThreadPoolExecutor(workers) as pool:
+        while too_big - fits > 1:
+            count = min(workers, too_big - fits - 1)
+            qualities = sorted({fits + (too_big - fits) * i // (count + 1) for i in range(1, count + 1)})
+            results = pool.map(encode_jpeg, images, qualities)
+            attempts += len(qualities)
+            for quality, data in zip(qualities, results):
+                # Size grows with quality, a rare larger quality that fits
+                # after a smaller one that didn't is not trusted
+                if len(data) <= max_bytes and quality < too_big:
+                    fits, best = quality, data
+                elif len(data) > max_bytes:
+                    too_big = min(too_big, quality)
+    if best is None:
+        raise ValueError(f"Can't compress to {max_bytes} bytes, quality {min_quality} is larger")
+    return best, fits, attempts
+
+
+def compress_image(image, output_path, quality=70, max_bytes=None, workers=1):
+    """Save image, JPEGs at quality, returns (quality, encode attempts)
+
+    With max_bytes (JPEG only), quality is the highest one allowed: the
+    file gets the highest quality up to it that fits in max_bytes, see
+    compress_to_size().
+    """
+    jpeg = output_path.lower().endswith(('.jpg', '.jpeg'))
     # Ensure RGB for JPEG
-    if output_path.lower().endswith(('.jpg', '.jpeg')):
+    if jpeg:
         image = image.convert("RGB")
-    image.save(output_path, quality=quality, optimize=True)
\ No newline at end of file
+    if max_bytes is None:
+        image.save(output_path, quality=quality, optimize=True)
+        return quality, 1
+    if not jpeg:
+        raise ValueError("A target file size needs a .jpg or .jpeg output")
+    data, quality, attempts = compress_to_size(image, max_bytes, max_quality=quality, workers=workers)
+    with open(output_path, "wb") as f:
+        f.write(data)
+    return quality, attempts
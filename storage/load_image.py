@@ -0,0 +1,56 @@
+import os
+import time
+
+from PIL import Image
+
+# Files Open Folder lists (same as the Upload Photo dialog)
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+def open_draft(path, max_side):
+    """Decode an image for display, as small as allowed by max_side
+
+    JPEGs are decoded with Pillow's draft mode, which lets libjpeg scale by
+    1/2, 1/4 or 1/8 while decoding (never below max_side on the long edge).
+    Returns (image, scale, seconds): scale is 1 when the image was decoded
+    at full resolution, so it can be used as the original.
+    """
+    start = time.perf_counter()
+    image = Image.open(path)
+    full_w, full_h = image.size
+    if image.format == "JPEG":
+        # draft() keeps both sides at or above the request, so ask for the
+        # aspect-correct size whose long edge is max_side
+        ratio = min(1.0, max_side / max(full_w, full_h))
+        image.draft("RGB", (int(full_w * ratio), int(full_h * ratio)))
+    image.load()
+    # Reduced decodes round their sides up (4001 wide at 1/2 is 2001), so
+    # compare sizes rather than divide them
+    if image.size == (full_w, full_h) or not image.size[0]:
+        scale = 1
+    else:
+        scale = max(2, round(full_w / image.size[0]))
+    return image, scale, time.perf_counter() - start
+
+
+def load_full(path):
+    """Decode an image at full resolution, returns (image, seconds)"""
+    start = time.perf_counter()
+    image = Image.open(path)
+    image.load()
+    return image, time.perf_counter() - start
+
+
+def make_thumbnail(path, max_side):
+    """Small RGB thumbnail, using draft decoding for JPEGs"""
+    image, _, _ = open_draft(path, max_side)
+    image = image.convert("RGB")
+    image.thumbnail((max_side, max_side))
+    return image
+
+
+def list_images(folder):
+    """Image files directly in folder, sorted by name"""
+    names = sorted(os.listdir(folder), key=str.lower)
+    paths = [os.path.join(folder, name) for name in names if name.lower().endswith(IMAGE_EXTENSIONS)]
+    return [path for path in paths if os.path.isfile(path)]
@@ -11,11 +11,59 @@ def save_to_album(image, album_path, format="JPEG", quality=95):
     ext_map = {"JPEG": "jpg", "PNG": "png", "BMP": "bmp"}
     ext = ext_map.get(format.upper(), "jpg")
     
-    filename = f"image_{timestamp}.{ext}"
-    save_path = os.path.join(album_path, filename)
-    
-    if format.upper() == "JPEG":
-        image.convert("RGB").save(save_path, format=format, quality=quality)
-    else:
-        image.save(save_path, format=format)
-    return save_path
\ No newline at end of file
+    save_path, f = _claim_name(album_path, f"image_{timestamp}", ext)
+    try:
+        with f:
+            if format.upper() == "JPEG":
+                image.convert("RGB").save(f, format=format, quality=quality)
+            else:
+                image.save(f, format=format)
+    except Exception:
+        os.remove(save_path)
+        raise
+    return save_path
+
+def _claim_name(album_path, stem, ext):
+    """(path, open file) for the first free stem, stem_2, stem_3, ... in album_path
+
+    Saves within the same second get a numbered name. The file is created
+    exclusively, so two saves at once never share it, and a name whose
+    album sidecar (.json) is still around is skipped.
+    """
+    number = 1
+    while True:
+        name = stem if number == 1 else f"{stem}_{number}"
+        path = os.path.join(album_path, f"{name}.{ext}")
+        if not os.path.exists(os.path.join(album_path, name + ".json")):
+            try:
+                return path, open(path, "xb")
+            except FileExistsError:
+                pass
+        number += 1
+
+def _write_replacing(file_path, write):
+    # Write to a temporary file and rename, so a cancelled or failed
+    # export never leaves a truncated image behind
+    temp_path = file_path + ".part"
+    try:
+        write(temp_path)
+        os.replace(temp_path, file_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return file_path
+
+def write_image(image, file_path, format="JPEG", quality=95):
+    def write(path):
+        if format.upper() == "JPEG":
+            image.convert("RGB").save(path, format=format, quality=quality, optimize=True)
+        else:
+            image.save(path, format=format)
+    return _write_replacing(file_path, write)
+
+def write_bytes(data, file_path):
+    """Write an already encoded image (e.g. from storage.compress), same safety as write_image"""
+    def write(path):
+        with open(path, "wb") as f:
+            f.write(data)
+    return _write_replacing(file_path, write)
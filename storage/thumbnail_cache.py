@@ -0,0 +1,49 @@
+import os
+import sqlite3
+
+
+class ThumbnailCache:
+    """Album thumbnails as JPEG blobs in a single SQLite file
+
+    Rows are keyed by file path and remember the file's size and mtime:
+    a thumbnail is only valid while both still match. Use from one thread
+    (the GUI thread); workers only produce the JPEG bytes.
+    """
+
+    def __init__(self, db_path):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(db_path)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS thumbnails ("
+            "path TEXT PRIMARY KEY, size INTEGER, mtime REAL, data BLOB)"
+        )
+        self.db.commit()
+
+    def index(self):
+        """{path: (size, mtime)} for every cached thumbnail, without reading blobs"""
+        rows = self.db.execute("SELECT path, size, mtime FROM thumbnails")
+        return {path: (size, mtime) for path, size, mtime in rows}
+
+    def get(self, path, size, mtime):
+        row = self.db.execute(
+            "SELECT data FROM thumbnails WHERE path = ? AND size = ? AND mtime = ?",
+            (path, size, mtime)
+        ).fetchone()
+        return row[0] if row else None
+
+    def put_many(self, rows):
+        """rows: iterable of (path, size, mtime, jpeg bytes)"""
+        self.db.executemany("INSERT OR REPLACE INTO thumbnails VALUES (?, ?, ?, ?)", rows)
+        self.db.commit()
+
+    def remove_missing(self, paths):
+        """Drop thumbnails of files that are no longer in paths"""
+        keep = set(paths)
+        stale = [(path,) for path in self.index() if path not in keep]
+        if stale:
+            self.db.executemany("DELETE FROM thumbnails WHERE path = ?", stale)
+            self.db.commit()
+        return len(stale)
+
+    def close(self):
+        self.db.close()